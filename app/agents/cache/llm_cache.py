@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.utils.cache import TTLCache
+
+logger = get_logger("llm_cache")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS llm_cache ("
+    "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+    "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+)
+
+
+def request_key(prompt: str, llm_string: str) -> str:
+    """Content address of one chat call: serialized messages plus model/params."""
+    return hashlib.sha256(f"{llm_string}\n{prompt}".encode()).hexdigest()
+
+
+class LLMCallCache(BaseCache):
+    """
+    Two-tier memoization of chat model calls.
+
+    LangChain hands every call's serialized messages (`prompt`) and the
+    model configuration (`llm_string`) to the cache; both are hashed into one
+    key. Hits are served from an in-memory LRU first, then from an optional
+    SQLite file whose total payload is kept under `max_bytes` by dropping the
+    least recently used rows.
+    """
+
+    def __init__(self, memory_size: int, path: Optional[str] = None, max_bytes: int = 0):
+        self.memory = TTLCache(maxsize=memory_size)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._bytes = 0
+        self.disk_hits = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+            self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            self._conn = conn
+            logger.info(f"LLM cache opened at {self.path} ({self._bytes / 1e6:.1f} MB)")
+        return self._conn
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = request_key(prompt, llm_string)
+        generations = self.memory.get(key)
+        if generations is not None or self.path is None:
+            return generations
+
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            generations = [loads(item) for item in json.loads(row[0])]
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+
+        self.disk_hits += 1
+        self.memory.set(key, generations)
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = request_key(prompt, llm_string)
+        self.memory.set(key, return_val)
+        if self.path is None:
+            return
+
+        try:
+            value = json.dumps([dumps(generation) for generation in return_val])
+            now = time.time()
+            with self._lock:
+                conn = self._connection()
+                previous = conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now, now)
+                )
+                self._bytes += len(value) - (previous[0] if previous else 0)
+                if self.max_bytes and self._bytes > self.max_bytes:
+                    self._evict(conn)
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used rows until the file is back under 90% of its budget."""
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while self._bytes > target:
+            rows = conn.execute(
+                "SELECT key, size FROM llm_cache ORDER BY accessed_at LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            conn.executemany("DELETE FROM llm_cache WHERE key = ?", [(row[0],) for row in rows])
+            self._bytes -= sum(row[1] for row in rows)
+            evicted += len(rows)
+        logger.info(f"LLM cache evicted {evicted} entries, {self._bytes / 1e6:.1f} MB kept")
+
+    def clear(self, **kwargs: Any) -> None:
+        self.memory.clear()
+        if self.path is None:
+            return
+        with self._lock:
+            self._connection().execute("DELETE FROM llm_cache")
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.memory.stats(), "disk_hits": self.disk_hits, "disk_bytes": self._bytes}
+
+
+LLM_CALL_CACHE = LLMCallCache(
+    memory_size=settings.LLM_CACHE_MEMORY_SIZE,
+    path=settings.LLM_CACHE_PATH,
+    max_bytes=settings.LLM_CACHE_MAX_MB * 1024 * 1024,
+)
+# Calls whose prompts carry credentials or member data never touch disk.
+LLM_MEMORY_CACHE = LLMCallCache(memory_size=settings.LLM_CACHE_MEMORY_SIZE)
+
+
+def resolve_cache(mode: Any) -> Optional[BaseCache]:
+    """Map a per-node `cache` option (True / "memory" / falsy) to a cache instance."""
+    if not settings.LLM_CACHE_ENABLED or not mode:
+        return None
+    if mode == "memory":
+        return LLM_MEMORY_CACHE
+    return LLM_CALL_CACHE
@@ -0,0 +1,155 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.agents.embeddings.schema_index import normalize_vector
+from app.agents.embeddings.service import normalize_query
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger("semantic_cache")
+
+_FOLLOW_UP = re.compile(
+    r"\b(it|its|that|this|those|these|they|them|their|he|she|him|her|his|there|"
+    r"same|above|previous|again|also|another|more|else|instead|then)\b"
+    r"|^\s*(and|but|or|so|what about|how about)\b",
+    re.IGNORECASE
+)
+
+
+def is_context_dependent(query: str, history: List) -> bool:
+    """True when the query likely refers back to earlier turns of the conversation."""
+    if not history:
+        return False
+    return bool(_FOLLOW_UP.search(query))
+
+
+class SemanticAnswerCache:
+    """
+    Nearest-neighbour cache of general-chat answers.
+
+    Each entry holds the normalized query embedding in one row of a
+    preallocated float32 matrix, so a lookup is a single matrix-vector
+    product. A hit needs cosine similarity >= `min_similarity` and an
+    unexpired entry. Entries are evicted LRU once `maxsize` is reached.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, min_similarity: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._keys_by_slot: Dict[int, str] = {}
+        self._active = np.zeros(maxsize, dtype=bool)
+        self._free: List[int] = list(range(maxsize - 1, -1, -1))
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def record_bypass(self):
+        self.bypasses += 1
+
+    def lookup(self, query: str, query_vector) -> Optional[str]:
+        key = normalize_query(query)
+        vec = normalize_vector(query_vector)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._matrix is not None and self._active.any() \
+                    and self._matrix.shape[1] == vec.shape[0]:
+                scores = np.where(self._active, self._matrix @ vec, -np.inf)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.min_similarity:
+                    entry = self._entries[self._keys_by_slot[best]]
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry["expires_at"] <= now:
+                self._remove(entry["key"])
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(entry["key"])
+            self.hits += 1
+
+        logger.debug(f"Answer cache hit for '{query}' via '{entry['query']}'")
+        return entry["answer"]
+
+    def put(self, query: str, query_vector, answer: str):
+        key = normalize_query(query)
+        vec = normalize_vector(query_vector)
+
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vec.shape[0]:
+                self._reset(vec.shape[0])
+
+            if key in self._entries:
+                self._remove(key)
+            while not self._free:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+            slot = self._free.pop()
+            self._matrix[slot] = vec
+            self._active[slot] = True
+            self._keys_by_slot[slot] = key
+            self._entries[key] = {
+                "key": key,
+                "query": query,
+                "answer": answer,
+                "slot": slot,
+                "expires_at": time.monotonic() + self.ttl,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._reset(self._matrix.shape[1] if self._matrix is not None else 0)
+
+    def _reset(self, dim: int):
+        self._entries.clear()
+        self._matrix = np.zeros((self.maxsize, dim), dtype=np.float32) if dim else None
+        self._active[:] = False
+        self._free = list(range(self.maxsize - 1, -1, -1))
+        self._keys_by_slot = {}
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._active[entry["slot"]] = False
+        self._keys_by_slot.pop(entry["slot"], None)
+        self._free.append(entry["slot"])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+ANSWER_CACHE = SemanticAnswerCache(
+    maxsize=settings.ANSWER_CACHE_SIZE,
+    ttl=settings.ANSWER_CACHE_TTL_SECONDS,
+    min_similarity=settings.ANSWER_CACHE_MIN_SIMILARITY,
+)
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.agents.cache.semantic_cache import is_context_dependent
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db.schema_catalog import SCHEMA_CATALOG, SchemaSnapshot
+from app.utils.cache import TTLCache
+
+logger = get_logger("sql_cache")
+
+_ENTITY = re.compile(r"'([^']*)'|\"([^\"]*)\"|\b(\d+(?:\.\d+)?)\b")
+_PUNCTUATION = re.compile(r"[^\w\s<>]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def mask_entities(question: str) -> Tuple[str, List[str]]:
+    """Replace quoted strings and numbers with positional placeholders."""
+    values: List[str] = []
+
+    def replace(match: re.Match) -> str:
+        values.append(next(group for group in match.groups() if group is not None))
+        return f" <v{len(values) - 1}> "
+
+    return _ENTITY.sub(replace, question), values
+
+
+def normalize_question(question: str, mask: bool = False) -> Tuple[str, List[str]]:
+    values: List[str] = []
+    if mask:
+        question, values = mask_entities(question)
+    question = _PUNCTUATION.sub(" ", question.casefold())
+    return _WHITESPACE.sub(" ", question).strip(), values
+
+
+def schema_fingerprint(schema_info: Dict[str, Any]) -> str:
+    """Hash of the tables, columns and joins the SQL generator was shown (sample rows excluded)."""
+    if not isinstance(schema_info, dict):
+        return hashlib.sha256(str(schema_info).encode()).hexdigest()[:24]
+    shape = {
+        "tables": sorted(
+            (table["table"], sorted(col["name"] for col in table.get("columns", [])))
+            for table in schema_info.get("schema", [])
+        ),
+        "joins": sorted(schema_info.get("join_paths") or []),
+    }
+    return hashlib.sha256(json.dumps(shape, default=str).encode()).hexdigest()[:24]
+
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_TEMPLATE_SLOT = re.compile(r"\{\{v(\d+)\}\}")
+
+
+def _sql_literal(value: str) -> str:
+    """Escape a value for a MySQL string literal (backslash is an escape character there too)."""
+    return value.replace("\\", "\\\\").replace("'", "''")
+
+
+def _literal_span(sql: str, value: str) -> Optional[Tuple[int, int]]:
+    """
+    Where a question value appears in SQL as a literal, or None if that is not clear-cut.
+
+    Numbers must be a standalone numeric literal (5 must not match 2025 or
+    t5.id); strings must sit inside a quoted string literal. A value found
+    more than once, or outside those positions, is ambiguous.
+    """
+    if _NUMBER.fullmatch(value):
+        matches = list(re.finditer(rf"(?<![\w.]){re.escape(value)}(?![\w.])", sql))
+    else:
+        needle = _sql_literal(value)
+        matches = list(re.finditer(re.escape(needle), sql)) if needle else []
+        literals = [m.span() for m in _STRING_LITERAL.finditer(sql)]
+        if len(matches) == 1 and not any(start < matches[0].start() and matches[0].end() < end
+                                         for start, end in literals):
+            return None
+    return matches[0].span() if len(matches) == 1 else None
+
+
+def _template(sql: str, values: List[str]) -> Optional[str]:
+    if _TEMPLATE_SLOT.search(sql):
+        return None
+
+    slots = []
+    for i, value in enumerate(values):
+        span = _literal_span(sql, value)
+        if span is None:
+            # The model rewrote the literal or the value also appears elsewhere; do not guess.
+            return None
+        slots.append((*span, i))
+
+    slots.sort()
+    if any(prev[1] > cur[0] for prev, cur in zip(slots, slots[1:])):
+        return None
+
+    template, last = [], 0
+    for start, end, i in slots:
+        template.append(sql[last:start])
+        template.append(f"{{{{v{i}}}}}")
+        last = end
+    template.append(sql[last:])
+    return "".join(template)
+
+
+class SQLQueryCache:
+    """
+    Cache of generated SQL keyed by normalized question and selected-schema fingerprint.
+
+    With entity masking, quoted strings and numbers in the question become
+    placeholders, and the stored SQL is a template that takes the new values
+    on a hit. Only SQL generated without conversation history is stored, as
+    it could otherwise carry another session's names or emails; entries
+    touching tables changed in the schema catalog are dropped.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, mask: bool):
+        self.mask = mask
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def _key(self, question: str, schema_info: Dict[str, Any]) -> Tuple[str, List[str]]:
+        normalized, values = normalize_question(question, self.mask)
+        return f"{schema_fingerprint(schema_info)}:{normalized}", values
+
+    def get(self, question: str, schema_info: Dict[str, Any], history: List) -> Optional[str]:
+        if is_context_dependent(question, history):
+            return None
+
+        key, values = self._key(question, schema_info)
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+
+        slots = {int(i) for i in _TEMPLATE_SLOT.findall(entry["sql"])}
+        if any(i >= len(values) for i in slots):
+            return None
+        sql = _TEMPLATE_SLOT.sub(lambda m: _sql_literal(values[int(m.group(1))]), entry["sql"])
+        logger.info(f"SQL cache hit for '{question}'")
+        return sql
+
+    def put(self, question: str, schema_info: Dict[str, Any], history: List, sql: str):
+        # The key has no identity in it: SQL written from this session's history is not for other sessions.
+        if not sql or history:
+            return
+
+        key, values = self._key(question, schema_info)
+        template = _template(sql, values)
+        if template is None:
+            return
+
+        tables = [table["table"] for table in schema_info.get("schema", [])] if isinstance(schema_info, dict) else []
+        self.cache.set(key, {"sql": template, "tables": tables})
+
+    def on_schema_change(self, snapshot: SchemaSnapshot):
+        if snapshot.changed_tables is None:
+            self.cache.clear()
+            return
+
+        stale = [
+            key for key, entry in self.cache.items()
+            if not entry["tables"] or snapshot.changed_tables.intersection(entry["tables"])
+        ]
+        for key in stale:
+            self.cache.pop(key)
+        if stale:
+            logger.info(f"SQL cache dropped {len(stale)} entries for changed tables {sorted(snapshot.changed_tables)}")
+
+
+SQL_CACHE = SQLQueryCache(
+    maxsize=settings.SQL_CACHE_SIZE,
+    ttl=settings.SQL_CACHE_TTL_SECONDS,
+    mask=settings.SQL_CACHE_MASK_ENTITIES,
+)
+SCHEMA_CATALOG.add_listener(SQL_CACHE.on_schema_change)
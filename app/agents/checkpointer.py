@@ -0,0 +1,726 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from sqlalchemy import (
+    Column, Float, Integer, LargeBinary, MetaData, String, Table, and_, create_engine, delete, event, or_, select,
+    tuple_
+)
+from sqlalchemy.dialects import mysql
+from sqlalchemy.engine import Engine, make_url
+
+from app.agents.content_store import CONTENT, CONTENT_METADATA, CONTENT_STORE
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger("checkpointer")
+
+_BLOB = LargeBinary().with_variant(mysql.LONGBLOB(), "mysql", "mariadb")
+_IN_CHUNK = 500
+
+METADATA = MetaData()
+
+CHECKPOINTS = Table(
+    "graph_checkpoints", METADATA,
+    Column("thread_id", String(128), primary_key=True),
+    Column("checkpoint_ns", String(255), primary_key=True),
+    Column("checkpoint_id", String(64), primary_key=True),
+    Column("parent_checkpoint_id", String(64), nullable=True),
+    Column("session_id", String(64), nullable=False, index=True),
+    Column("type", String(32), nullable=False),
+    Column("checkpoint", _BLOB, nullable=False),
+    Column("metadata_type", String(32), nullable=False),
+    Column("metadata", _BLOB, nullable=False),
+    Column("created_at", Float, nullable=False),
+)
+
+WRITES = Table(
+    "graph_checkpoint_writes", METADATA,
+    Column("thread_id", String(128), primary_key=True),
+    Column("checkpoint_ns", String(255), primary_key=True),
+    Column("checkpoint_id", String(64), primary_key=True),
+    Column("task_id", String(64), primary_key=True),
+    Column("idx", Integer, primary_key=True, autoincrement=False),
+    Column("channel", String(255), nullable=False),
+    Column("type", String(32), nullable=False),
+    Column("value", _BLOB, nullable=False),
+    Column("task_path", String(255), nullable=False, default=""),
+)
+
+BLOBS = Table(
+    "graph_checkpoint_blobs", METADATA,
+    Column("thread_id", String(128), primary_key=True),
+    Column("checkpoint_ns", String(255), primary_key=True),
+    Column("channel", String(255), primary_key=True),
+    Column("version", String(64), primary_key=True),
+    Column("type", String(32), nullable=False),
+    Column("blob", _BLOB, nullable=False),
+)
+
+# channel -> (version, serde type, serialized value)
+Blobs = Dict[str, Tuple[str, str, bytes]]
+
+
+def session_of(thread_id: str) -> str:
+    """Threads are named `{session_id}_conv_{conversation_id}` by ChatService."""
+    return thread_id.split("_conv_", 1)[0]
+
+
+def _chunks(items: Sequence, size: int = _IN_CHUNK) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class CheckpointBacklogFullError(RuntimeError):
+    """Raised when the write buffer is full because the checkpoint database keeps failing."""
+
+
+class SQLCheckpointSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer on SQLAlchemy (SQLite locally, MySQL in production).
+
+    Checkpoints are delta-encoded: the checkpoint row holds only channel
+    versions, and each channel value is stored once per version, so a step
+    serializes and writes just the channels it changed. Writes are buffered
+    and flushed in batches by a background thread, one transaction per
+    batch, after which each touched thread is pruned to its `keep_latest`
+    checkpoints. The latest checkpoint of the most recently used threads is
+    kept serialized in a small LRU; anything else is loaded from the database
+    on demand. Threads whose chat session has expired (or was deleted) are
+    evicted periodically. A failing flush is retried with exponential
+    backoff, and once `max_pending` rows are buffered new checkpoints are
+    refused, so a database outage fails turns instead of growing memory.
+    """
+
+    def __init__(
+            self,
+            url: str,
+            keep_latest: int,
+            flush_interval: float,
+            batch_size: int,
+            hot_threads: int,
+            evict_interval: float,
+            max_pending: int,
+            max_backoff: float
+    ):
+        super().__init__()
+        self.url = url
+        self.keep_latest = max(keep_latest, 1)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.hot_threads = hot_threads
+        self.evict_interval = evict_interval
+        self.max_pending = max_pending
+        self.max_backoff = max_backoff
+
+        self._engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_evicted = time.monotonic()
+        self._flush_failures = 0
+        self._retry_at = 0.0
+        self._last_backlog_warning = 0.0
+
+        self._pending_checkpoints: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._pending_writes: Dict[Tuple[str, str, str, str, int], Dict[str, Any]] = {}
+        self._pending_blobs: Dict[Tuple[str, str, str, str], Dict[str, Any]] = {}
+        # (thread_id, checkpoint_ns) -> (checkpoint row, {(task_id, idx): write row}, channel blobs)
+        self._hot: "OrderedDict[Tuple[str, str], Tuple[Dict[str, Any], Dict[Tuple[str, int], Any], Blobs]]" = (
+            OrderedDict()
+        )
+        self.stats_counters = {"flushes": 0, "rows_flushed": 0, "blobs_written": 0, "blobs_reused": 0,
+                               "pruned": 0, "evicted_threads": 0, "hot_hits": 0, "db_loads": 0,
+                               "flush_failures": 0, "rejected_backlog_full": 0}
+
+    # -- storage -----------------------------------------------------------
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._engine = self._create_engine()
+        return self._engine
+
+    def _create_engine(self) -> Engine:
+        url = make_url(self.url)
+        if url.get_backend_name() != "sqlite":
+            db_engine = create_engine(url, pool_pre_ping=True, pool_recycle=3600)
+        else:
+            if url.database:
+                os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+            db_engine = create_engine(url, connect_args={"check_same_thread": False})
+
+            @event.listens_for(db_engine, "connect")
+            def _sqlite_pragmas(dbapi_connection, _):
+                dbapi_connection.execute("PRAGMA journal_mode=WAL")
+                dbapi_connection.execute("PRAGMA synchronous=NORMAL")
+
+        METADATA.create_all(db_engine)
+        CONTENT_METADATA.create_all(db_engine)
+        logger.info(f"Checkpoint store ready on {url.get_backend_name()}")
+        return db_engine
+
+    def _upsert(self, table: Table):
+        dialect = self.engine.dialect.name
+        keys = [column.name for column in table.primary_key]
+        values = [column.name for column in table.columns if column.name not in keys]
+
+        if dialect in ("mysql", "mariadb"):
+            stmt = mysql.insert(table)
+            return stmt.on_duplicate_key_update({name: stmt.inserted[name] for name in values})
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=keys, set_={name: stmt.excluded[name] for name in values}
+        )
+
+    # -- background flushing -----------------------------------------------
+
+    def _ensure_started(self):
+        if self._thread is not None or self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if time.monotonic() >= self._retry_at:
+                self.flush()
+            if self.evict_interval > 0 and time.monotonic() - self._last_evicted >= self.evict_interval:
+                self._last_evicted = time.monotonic()
+                self.evict_expired()
+
+    def close(self):
+        """Stop the writer thread and flush whatever is still buffered."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                checkpoints, self._pending_checkpoints = self._pending_checkpoints, {}
+                writes, self._pending_writes = self._pending_writes, {}
+                blobs, self._pending_blobs = self._pending_blobs, {}
+            contents = CONTENT_STORE.drain()
+            if not checkpoints and not writes and not blobs and not contents:
+                return
+
+            try:
+                with self.engine.begin() as conn:
+                    for table, rows in ((CONTENT, contents), (BLOBS, list(blobs.values())),
+                                        (CHECKPOINTS, list(checkpoints.values())), (WRITES, list(writes.values()))):
+                        if rows:
+                            conn.execute(self._upsert(table), rows)
+                    pruned = self._prune(conn, {(thread, ns) for thread, ns, _ in checkpoints})
+            except Exception as e:
+                self._flush_failures += 1
+                self.stats_counters["flush_failures"] += 1
+                backoff = min(self.max_backoff, max(self.flush_interval, 0.05) * 2 ** self._flush_failures)
+                self._retry_at = time.monotonic() + backoff
+                logger.error(
+                    f"Checkpoint flush of {len(checkpoints) + len(writes) + len(blobs) + len(contents)} rows failed "
+                    f"({self._flush_failures} in a row), retrying in {backoff:.1f}s: {e}"
+                )
+                CONTENT_STORE.restore(contents)
+                with self._lock:
+                    for pending, rows in ((self._pending_checkpoints, checkpoints),
+                                          (self._pending_writes, writes), (self._pending_blobs, blobs)):
+                        for key, row in rows.items():
+                            pending.setdefault(key, row)
+                return
+
+            if self._flush_failures:
+                logger.info(f"Checkpoint flush recovered after {self._flush_failures} failed attempts")
+                self._flush_failures = 0
+                self._retry_at = 0.0
+            self.stats_counters["flushes"] += 1
+            self.stats_counters["rows_flushed"] += len(checkpoints) + len(writes) + len(blobs) + len(contents)
+            self.stats_counters["pruned"] += pruned
+
+    def _prune(self, conn, threads: Set[Tuple[str, str]]) -> int:
+        """
+        Drop everything but the newest `keep_latest` checkpoints of each thread,
+        with their writes and the channel versions none of them still uses.
+        """
+        pruned = 0
+        for thread_id, checkpoint_ns in threads:
+            same_thread = and_(CHECKPOINTS.c.thread_id == thread_id, CHECKPOINTS.c.checkpoint_ns == checkpoint_ns)
+            ids = [
+                row[0] for row in conn.execute(
+                    select(CHECKPOINTS.c.checkpoint_id).where(same_thread)
+                    .order_by(CHECKPOINTS.c.checkpoint_id.desc())
+                )
+            ]
+            stale = ids[self.keep_latest:]
+            if not stale:
+                continue
+
+            for chunk in _chunks(stale):
+                conn.execute(delete(CHECKPOINTS).where(same_thread, CHECKPOINTS.c.checkpoint_id.in_(chunk)))
+                conn.execute(delete(WRITES).where(
+                    WRITES.c.thread_id == thread_id,
+                    WRITES.c.checkpoint_ns == checkpoint_ns,
+                    WRITES.c.checkpoint_id.in_(chunk),
+                ))
+
+            # Channel versions only grow, so anything older than what the oldest kept checkpoint uses is garbage.
+            oldest = conn.execute(
+                select(CHECKPOINTS.c.type, CHECKPOINTS.c.checkpoint)
+                .where(same_thread, CHECKPOINTS.c.checkpoint_id == ids[self.keep_latest - 1])
+            ).first()
+            versions = self.serde.loads_typed((oldest[0], oldest[1])).get("channel_versions", {})
+            if versions:
+                conn.execute(delete(BLOBS).where(
+                    BLOBS.c.thread_id == thread_id,
+                    BLOBS.c.checkpoint_ns == checkpoint_ns,
+                    or_(*(and_(BLOBS.c.channel == channel, BLOBS.c.version < str(version))
+                          for channel, version in versions.items())),
+                ))
+            pruned += len(stale)
+        return pruned
+
+    # -- eviction ----------------------------------------------------------
+
+    def evict_expired(self) -> int:
+        """Delete the threads of chat sessions that have expired or no longer exist."""
+        from app.db.dbconnection import SessionLocal
+        from app.models.session import Session
+
+        threads: List[str] = []
+        try:
+            with self.engine.connect() as conn:
+                stored = [row[0] for row in conn.execute(select(CHECKPOINTS.c.session_id).distinct())]
+
+            live: Set[str] = set()
+            now = datetime.utcnow()
+            with SessionLocal() as db:
+                for ids in _chunks(stored):
+                    live.update(
+                        row[0] for row in db.query(Session.session_id).filter(
+                            Session.session_id.in_(ids),
+                            (Session.expires_at.is_(None)) | (Session.expires_at >= now),
+                        )
+                    )
+            expired = [session_id for session_id in stored if session_id not in live]
+
+            self.flush()
+            with self.engine.begin() as conn:
+                for ids in _chunks(expired):
+                    threads.extend(row[0] for row in conn.execute(
+                        select(CHECKPOINTS.c.thread_id).where(CHECKPOINTS.c.session_id.in_(ids)).distinct()
+                    ))
+                for ids in _chunks(threads):
+                    for table in (WRITES, BLOBS, CHECKPOINTS):
+                        conn.execute(delete(table).where(table.c.thread_id.in_(ids)))
+                expired_content = CONTENT_STORE.expire(conn)
+
+            with self._lock:
+                expired_set = set(expired)
+                for key in [key for key in self._hot if session_of(key[0]) in expired_set]:
+                    del self._hot[key]
+        except Exception as e:
+            logger.error(f"Checkpoint eviction failed: {e}")
+            return 0
+
+        self.stats_counters["evicted_threads"] += len(threads)
+        if threads or expired_content:
+            logger.info(
+                f"Evicted {len(threads)} checkpoint threads of {len(expired)} expired sessions "
+                f"and {expired_content} stale content rows"
+            )
+        return len(threads)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for pending in (self._pending_checkpoints, self._pending_writes, self._pending_blobs):
+                for key in [key for key in pending if key[0] == thread_id]:
+                    del pending[key]
+            for key in [key for key in self._hot if key[0] == thread_id]:
+                del self._hot[key]
+        with self.engine.begin() as conn:
+            for table in (WRITES, BLOBS, CHECKPOINTS):
+                conn.execute(delete(table).where(table.c.thread_id == thread_id))
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # -- hot cache ---------------------------------------------------------
+
+    def _remember(
+            self,
+            key: Tuple[str, str],
+            row: Dict[str, Any],
+            writes: Dict[Tuple[str, int], Dict[str, Any]],
+            blobs: Blobs
+    ):
+        self._hot[key] = (row, writes, blobs)
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_threads:
+            self._hot.popitem(last=False)
+
+    def _hot_latest(self, thread_id: str, checkpoint_ns: str):
+        with self._lock:
+            entry = self._hot.get((thread_id, checkpoint_ns))
+            if entry is None:
+                return None
+            row, writes, blobs = entry
+            pending = (thread_id, checkpoint_ns, row["checkpoint_id"]) in self._pending_checkpoints
+            writes = list(writes.values())
+
+        # Another worker may have moved the thread on since this copy was flushed.
+        if not pending and self._latest_id(thread_id, checkpoint_ns) != row["checkpoint_id"]:
+            with self._lock:
+                self._hot.pop((thread_id, checkpoint_ns), None)
+            return None
+        return row, writes, blobs
+
+    def _latest_id(self, thread_id: str, checkpoint_ns: str) -> Optional[str]:
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(CHECKPOINTS.c.checkpoint_id)
+                .where(CHECKPOINTS.c.thread_id == thread_id, CHECKPOINTS.c.checkpoint_ns == checkpoint_ns)
+                .order_by(CHECKPOINTS.c.checkpoint_id.desc()).limit(1)
+            ).scalar()
+
+    # -- BaseCheckpointSaver -----------------------------------------------
+
+    def _tuple(self, row: Dict[str, Any], writes: List[Dict[str, Any]], blobs: Blobs) -> CheckpointTuple:
+        configurable = {"thread_id": row["thread_id"], "checkpoint_ns": row["checkpoint_ns"]}
+        parent = row["parent_checkpoint_id"]
+        checkpoint = self.serde.loads_typed((row["type"], row["checkpoint"]))
+        versions = checkpoint.get("channel_versions", {})
+        checkpoint["channel_values"] = {
+            channel: self.serde.loads_typed((value_type, blob))
+            for channel, (version, value_type, blob) in blobs.items()
+            if value_type != "empty" and str(versions.get(channel)) == version
+        }
+        return CheckpointTuple(
+            config={"configurable": {**configurable, "checkpoint_id": row["checkpoint_id"]}},
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed((row["metadata_type"], row["metadata"])),
+            parent_config={"configurable": {**configurable, "checkpoint_id": parent}} if parent else None,
+            pending_writes=[
+                (write["task_id"], write["channel"], self.serde.loads_typed((write["type"], write["value"])))
+                for write in sorted(writes, key=lambda write: (write["task_id"], write["idx"]))
+            ],
+        )
+
+    def _load(self, conn, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str]):
+        query = select(CHECKPOINTS).where(
+            CHECKPOINTS.c.thread_id == thread_id, CHECKPOINTS.c.checkpoint_ns == checkpoint_ns
+        )
+        if checkpoint_id:
+            query = query.where(CHECKPOINTS.c.checkpoint_id == checkpoint_id)
+        row = conn.execute(query.order_by(CHECKPOINTS.c.checkpoint_id.desc()).limit(1)).mappings().first()
+        if row is None:
+            return None
+        row = dict(row)
+        return row, self._load_writes(conn, row), self._load_blobs(conn, row)
+
+    @staticmethod
+    def _load_writes(conn, row: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [dict(write) for write in conn.execute(select(WRITES).where(
+            WRITES.c.thread_id == row["thread_id"],
+            WRITES.c.checkpoint_ns == row["checkpoint_ns"],
+            WRITES.c.checkpoint_id == row["checkpoint_id"],
+        )).mappings()]
+
+    def _load_blobs(self, conn, row: Dict[str, Any]) -> Blobs:
+        versions = self.serde.loads_typed((row["type"], row["checkpoint"])).get("channel_versions", {})
+        pairs = [(channel, str(version)) for channel, version in versions.items()]
+        blobs: Blobs = {}
+        for chunk in _chunks(pairs):
+            for blob in conn.execute(select(BLOBS).where(
+                BLOBS.c.thread_id == row["thread_id"],
+                BLOBS.c.checkpoint_ns == row["checkpoint_ns"],
+                tuple_(BLOBS.c.channel, BLOBS.c.version).in_(chunk),
+            )).mappings():
+                blobs[blob["channel"]] = (blob["version"], blob["type"], blob["blob"])
+        return blobs
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        if not checkpoint_id:
+            hot = self._hot_latest(thread_id, checkpoint_ns)
+            if hot is not None:
+                self.stats_counters["hot_hits"] += 1
+                return self._tuple(*hot)
+
+        self.flush()
+        with self.engine.connect() as conn:
+            loaded = self._load(conn, thread_id, checkpoint_ns, checkpoint_id)
+        if loaded is None:
+            return None
+
+        self.stats_counters["db_loads"] += 1
+        row, writes, blobs = loaded
+        if not checkpoint_id:
+            with self._lock:
+                self._remember(
+                    (thread_id, checkpoint_ns), row,
+                    {(write["task_id"], write["idx"]): write for write in writes}, blobs
+                )
+        return self._tuple(row, writes, blobs)
+
+    def list(
+            self,
+            config: Optional[RunnableConfig],
+            *,
+            filter: Optional[Dict[str, Any]] = None,
+            before: Optional[RunnableConfig] = None,
+            limit: Optional[int] = None
+    ) -> Iterator[CheckpointTuple]:
+        self.flush()
+        query = select(CHECKPOINTS)
+        if config is not None:
+            query = query.where(CHECKPOINTS.c.thread_id == config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                query = query.where(CHECKPOINTS.c.checkpoint_ns == checkpoint_ns)
+            if get_checkpoint_id(config):
+                query = query.where(CHECKPOINTS.c.checkpoint_id == get_checkpoint_id(config))
+        if before is not None and get_checkpoint_id(before):
+            query = query.where(CHECKPOINTS.c.checkpoint_id < get_checkpoint_id(before))
+
+        with self.engine.connect() as conn:
+            rows = [dict(row) for row in conn.execute(query.order_by(CHECKPOINTS.c.checkpoint_id.desc())).mappings()]
+            returned = 0
+            for row in rows:
+                if limit is not None and returned >= limit:
+                    break
+                if filter:
+                    metadata = self.serde.loads_typed((row["metadata_type"], row["metadata"]))
+                    if any(metadata.get(key) != value for key, value in filter.items()):
+                        continue
+                returned += 1
+                yield self._tuple(row, self._load_writes(conn, row), self._load_blobs(conn, row))
+
+    def put(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        self._admit()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        values = checkpoint.get("channel_values", {})
+
+        # Only channels that changed in this step are serialized; the rest are referenced by version.
+        changed: Blobs = {}
+        for channel, version in new_versions.items():
+            value_type, blob = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")
+            changed[channel] = (str(version), value_type, blob)
+
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed({**checkpoint, "channel_values": {}})
+        metadata_type, metadata_blob = self.serde.dumps_typed(metadata)
+        row = {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+            "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+            "session_id": session_of(thread_id)[:64],
+            "type": checkpoint_type,
+            "checkpoint": checkpoint_blob,
+            "metadata_type": metadata_type,
+            "metadata": metadata_blob,
+            "created_at": time.time(),
+        }
+
+        key = (thread_id, checkpoint_ns)
+        versions = {channel: str(version) for channel, version in checkpoint.get("channel_versions", {}).items()}
+        with self._lock:
+            self._pending_checkpoints[(thread_id, checkpoint_ns, checkpoint["id"])] = row
+            for channel, (version, value_type, blob) in changed.items():
+                self._pending_blobs[(thread_id, checkpoint_ns, channel, version)] = {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "channel": channel,
+                    "version": version,
+                    "type": value_type,
+                    "blob": blob,
+                }
+
+            previous = self._hot.get(key)
+            blobs = {
+                channel: blob for channel, blob in (previous[2] if previous is not None else {}).items()
+                if versions.get(channel) == blob[0]
+            }
+            blobs.update(changed)
+            if all(channel in blobs for channel in versions):
+                self._remember(key, row, {}, blobs)
+            else:
+                # Unchanged channels of a cold thread are not in memory; reload on the next read.
+                self._hot.pop(key, None)
+            backlog = self._backlog()
+
+        self.stats_counters["blobs_written"] += len(changed)
+        self.stats_counters["blobs_reused"] += len(versions) - len(changed)
+        self._after_buffering(backlog)
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = ""
+    ) -> None:
+        self._admit()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        with self._lock:
+            hot = self._hot.get((thread_id, checkpoint_ns))
+            hot_writes = hot[1] if hot is not None and hot[0]["checkpoint_id"] == checkpoint_id else None
+
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                key = (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                # Special channels (errors, interrupts) are replaced; regular writes are recorded once.
+                if idx >= 0 and key in self._pending_writes:
+                    continue
+                value_type, value_blob = self.serde.dumps_typed(value)
+                row = {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                    "task_id": task_id,
+                    "idx": idx,
+                    "channel": channel,
+                    "type": value_type,
+                    "value": value_blob,
+                    "task_path": task_path,
+                }
+                self._pending_writes[key] = row
+                if hot_writes is not None:
+                    hot_writes[(task_id, idx)] = row
+            backlog = self._backlog()
+
+        self._after_buffering(backlog)
+
+    def _backlog(self) -> int:
+        """Buffered rows; call with `_lock` held."""
+        return len(self._pending_checkpoints) + len(self._pending_writes) + len(self._pending_blobs)
+
+    def _admit(self):
+        """Refuse new rows while the buffer is full, i.e. the database has been failing for a while."""
+        with self._lock:
+            backlog = self._backlog()
+        backlog += CONTENT_STORE.backlog()
+        if backlog < self.max_pending:
+            return
+        self.stats_counters["rejected_backlog_full"] += 1
+        if time.monotonic() - self._last_backlog_warning >= 10:
+            self._last_backlog_warning = time.monotonic()
+            logger.warning(f"Checkpoint buffer full ({backlog} rows pending), refusing new checkpoints")
+        raise CheckpointBacklogFullError(f"Checkpoint store unavailable: {backlog} rows waiting to be written")
+
+    def _after_buffering(self, backlog: int):
+        if self.flush_interval <= 0:
+            self.flush()
+            return
+        self._ensure_started()
+        if backlog >= self.batch_size:
+            self._wake.set()
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+            self,
+            config: Optional[RunnableConfig],
+            *,
+            filter: Optional[Dict[str, Any]] = None,
+            before: Optional[RunnableConfig] = None,
+            limit: Optional[int] = None
+    ) -> AsyncIterator[CheckpointTuple]:
+        tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = ""
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = self._backlog()
+            hot = len(self._hot)
+        return {**self.stats_counters, "pending_rows": pending, "hot_threads": hot,
+                "flush_retry_in_seconds": round(max(self._retry_at - time.monotonic(), 0.0), 2)}
+
+
+CHECKPOINTER = SQLCheckpointSaver(
+    settings.CHECKPOINT_DATABASE_URL,
+    keep_latest=settings.CHECKPOINT_KEEP_LATEST,
+    flush_interval=settings.CHECKPOINT_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.CHECKPOINT_FLUSH_BATCH_SIZE,
+    hot_threads=settings.CHECKPOINT_HOT_THREADS,
+    evict_interval=settings.CHECKPOINT_EVICT_INTERVAL_SECONDS,
+    max_pending=settings.CHECKPOINT_MAX_PENDING_ROWS,
+    max_backoff=settings.CHECKPOINT_FLUSH_MAX_BACKOFF_SECONDS,
+)
+CONTENT_STORE.bind(lambda: CHECKPOINTER.engine)
@@ -0,0 +1,39 @@
+from typing import Any, Dict, Optional, Tuple
+
+from app.agents.cache.semantic_cache import is_context_dependent
+from app.agents.cache.sql_cache import normalize_question, schema_fingerprint
+from app.agents.state import AgentState
+from app.utils.single_flight import SingleFlight
+
+PUBLIC_SCOPE = "public"
+
+STAGE_FLIGHTS = SingleFlight("graph_stages")
+
+
+def auth_scope(state: AgentState) -> str:
+    """Identity a stage's result may depend on; members never share work across emails."""
+    email = state.get("user_email", "").strip().casefold()
+    if email or state.get("credentials_valid"):
+        return f"member:{email}"
+    return PUBLIC_SCOPE
+
+
+def schema_search_key(state: AgentState) -> Tuple:
+    # The result only depends on whether credentials were supplied, not on whose.
+    has_credentials = bool(state.get("user_email", "").strip() and state.get("user_password", "").strip())
+    question, _ = normalize_question(state.get("user_query", ""))
+    return "schema_search", question, has_credentials
+
+
+def sql_generation_key(state: AgentState, schema_info, history) -> Optional[Tuple]:
+    question = state.get("user_query", "")
+    if is_context_dependent(question, history):
+        return None
+    normalized, _ = normalize_question(question)
+    return "sql_generation", normalized, schema_fingerprint(schema_info), auth_scope(state)
+
+
+def sql_execution_key(state: AgentState, sql_query: str, params: Optional[Dict[str, Any]] = None) -> Tuple:
+    # The bound values decide the rows: an unverified caller binds no member and must not share a verified result.
+    bound = tuple(sorted((params or {}).items()))
+    return "sql_execution", " ".join(sql_query.split()), auth_scope(state), bound
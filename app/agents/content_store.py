@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import Column, Float, Integer, LargeBinary, MetaData, String, Table, delete, select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.utils.cache import TTLCache
+
+logger = get_logger("content_store")
+
+CONTENT_METADATA = MetaData()
+
+CONTENT = Table(
+    "graph_content", CONTENT_METADATA,
+    Column("hash", String(64), primary_key=True),
+    Column("data", LargeBinary().with_variant(mysql.LONGBLOB(), "mysql", "mariadb"), nullable=False),
+    Column("size", Integer, nullable=False),
+    Column("touched_at", Float, nullable=False, index=True),
+)
+
+
+def content_ref(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ContentMissingError(LookupError):
+    """A state field references content that is no longer stored."""
+
+
+class ContentStore:
+    """
+    Content-addressed side store for large graph state payloads.
+
+    Nodes put the detailed schema and SQL results here and keep only the
+    hash in the checkpointed state; consumers load them back by hash when
+    they need them. New payloads are buffered and persisted by the
+    checkpointer in the same transaction as the checkpoint that references
+    them, so a thread resumed on another worker finds them in the database.
+    Every put or database load of a payload refreshes its row at most once
+    per `ttl / 8`, so rows not used for `ttl` seconds are expired with the
+    threads that referenced them while shared, reused payloads stay.
+    """
+
+    def __init__(self, memory_size: int, memory_ttl: float, ttl: float):
+        self.memory = TTLCache(maxsize=memory_size, ttl=memory_ttl)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # ref -> last time its row was (re)written; entries lapse when a touch is due again.
+        self._touched = TTLCache(maxsize=memory_size * 4, ttl=ttl / 8 if ttl > 0 else None)
+        self._engine: Optional[Callable[[], Engine]] = None
+
+    def bind(self, engine: Callable[[], Engine]):
+        """Attach the (lazily created) database engine of the checkpoint store."""
+        self._engine = engine
+
+    def put(self, value: Any) -> Optional[str]:
+        if value is None:
+            return None
+        data = json.dumps(value, default=str, sort_keys=True).encode()
+        ref = content_ref(data)
+        self._touch(ref, data)
+        self.memory.set(ref, value)
+        return ref
+
+    def _touch(self, ref: str, data: bytes):
+        """Queue the row for writing if it is new here or its `touched_at` is due for a refresh."""
+        if self._touched.get(ref) is not None:
+            return
+        now = time.time()
+        self._touched.set(ref, now)
+        with self._lock:
+            self._pending[ref] = {"hash": ref, "data": data, "size": len(data), "touched_at": now}
+
+    def get(self, ref: Optional[str], default: Any = None) -> Any:
+        """Load content by ref; `default` only stands in for an unset ref, a lost payload raises."""
+        if not ref:
+            return default
+        value = self.memory.get(ref)
+        if value is not None:
+            return value
+
+        with self._lock:
+            row = self._pending.get(ref)
+        if row is None and self._engine is not None:
+            try:
+                with self._engine().connect() as conn:
+                    row = conn.execute(select(CONTENT.c.data).where(CONTENT.c.hash == ref)).mappings().first()
+            except Exception as e:
+                logger.error(f"Content {ref[:12]} lookup failed: {e}")
+                raise
+        if row is None:
+            logger.error(f"Content {ref[:12]} not found")
+            raise ContentMissingError(f"Content {ref[:12]} referenced by the graph state is no longer stored")
+
+        self._touch(ref, row["data"])
+        value = json.loads(row["data"])
+        self.memory.set(ref, value)
+        return value
+
+    async def aget(self, ref: Optional[str], default: Any = None) -> Any:
+        value = self.memory.get(ref) if ref else None
+        if value is not None:
+            return value
+        return await asyncio.to_thread(self.get, ref, default)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Take the buffered rows; the caller writes them or hands them back with `restore`."""
+        with self._lock:
+            rows, self._pending = list(self._pending.values()), {}
+        return rows
+
+    def restore(self, rows: List[Dict[str, Any]]):
+        with self._lock:
+            for row in rows:
+                self._pending.setdefault(row["hash"], row)
+
+    def expire(self, conn) -> int:
+        if self.ttl <= 0:
+            return 0
+        return conn.execute(delete(CONTENT).where(CONTENT.c.touched_at < time.time() - self.ttl)).rowcount
+
+    def backlog(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {**self.memory.stats(), "pending": pending}
+
+
+CONTENT_STORE = ContentStore(
+    memory_size=settings.CONTENT_STORE_MEMORY_SIZE,
+    memory_ttl=settings.CONTENT_STORE_MEMORY_TTL_SECONDS,
+    ttl=settings.CONTENT_STORE_TTL_SECONDS,
+)
@@ -0,0 +1,98 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.agents.embeddings.schema_index import normalize_rows, normalize_vector
+from app.core.logger import get_logger
+from app.enums.intent import intents
+
+logger = get_logger("intent_index")
+
+INTENT_EXAMPLES: Dict[intents, List[str]] = {
+    intents.GENERAL: [
+        "hi",
+        "hello there",
+        "good morning",
+        "hey, how are you?",
+        "thanks",
+        "thank you so much for your help",
+        "bye, have a nice day",
+        "who are you?",
+        "what can you help me with?",
+        "what are the library opening hours?",
+        "how do I contact the library?",
+        "what is the library's borrowing policy?",
+        "can you explain how library membership works?",
+        "do you have wifi in the library?",
+        "tell me a fun fact about libraries",
+    ],
+    intents.SQL_QUERY: [
+        "is harry potter available?",
+        "how many copies of the hobbit do you have?",
+        "which books did tolkien write?",
+        "show me books published in 2020",
+        "list the books in the science section",
+        "which shelf is the great gatsby on?",
+        "what books have I borrowed?",
+        "when is my loan due?",
+        "do I have any unpaid fines?",
+        "show my reservations",
+        "which branch has the most books?",
+        "what events are coming up this month?",
+        "who publishes the lord of the rings?",
+        "find books by authors from japan",
+        "how many members joined last year?",
+    ],
+}
+
+
+class IntentExampleIndex:
+    """
+    kNN intent classifier over embeddings of labelled example queries.
+
+    The examples are embedded once per embedding model. A query takes the
+    similarity-weighted vote of its `k` nearest examples; the winning intent
+    comes with its vote share as a confidence.
+    """
+
+    def __init__(self, examples: Dict[intents, List[str]]):
+        self.examples = examples
+        self._lock = threading.Lock()
+        self._state: Tuple[Optional[str], List[intents], Optional[np.ndarray]] = (None, [], None)
+
+    def ensure(self, embedder, model_name: str) -> "IntentExampleIndex":
+        if self._state[0] == model_name:
+            return self
+        with self._lock:
+            if self._state[0] != model_name:
+                labels = [intent for intent, texts in self.examples.items() for _ in texts]
+                texts = [text for texts in self.examples.values() for text in texts]
+                matrix = normalize_rows(np.asarray(embedder.embed_documents(texts), dtype=np.float32))
+                self._state = (model_name, labels, matrix)
+                logger.info(f"Intent index built: {len(texts)} examples for {len(self.examples)} intents")
+        return self
+
+    def classify(self, query_vector, k: int) -> Tuple[Optional[intents], float, float]:
+        """Return (intent, confidence, best similarity) for the query embedding."""
+        _, labels, matrix = self._state
+        if matrix is None or not labels:
+            return None, 0.0, 0.0
+
+        scores = matrix @ normalize_vector(query_vector)
+        k = min(k, len(labels))
+        top = np.argpartition(-scores, k - 1)[:k]
+
+        votes: Dict[intents, float] = {}
+        for i in top:
+            votes[labels[i]] = votes.get(labels[i], 0.0) + max(float(scores[i]), 0.0)
+
+        total = sum(votes.values())
+        if not total:
+            return None, 0.0, 0.0
+        intent = max(votes, key=votes.get)
+        best = max(float(scores[i]) for i in top if labels[i] == intent)
+        return intent, votes[intent] / total, best
+
+
+INTENT_INDEX = IntentExampleIndex(INTENT_EXAMPLES)
@@ -0,0 +1,56 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from app.core.logger import get_logger
+from .base import EmbeddingProvider
+
+logger = get_logger("local_embedding_provider")
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    In-process CPU embeddings via sentence-transformers.
+
+    Batches larger than `batch_size` are sharded across a thread pool; torch
+    releases the GIL during inference so shards run in parallel.
+    """
+
+    def __init__(self, model_name: str, device: str = "cpu", workers: int = 2, batch_size: int = 32):
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="local-embed")
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    logger.info(f"Loading local embedding model {self.model_name} on {self.device}")
+                    self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) <= self.batch_size:
+            return self._encode(texts)
+
+        shards = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        vectors: List[List[float]] = []
+        for shard_vectors in self._executor.map(self._encode, shards):
+            vectors.extend(shard_vectors)
+        return vectors
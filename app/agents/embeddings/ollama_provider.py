@@ -0,0 +1,17 @@
+from typing import List
+
+from langchain_community.embeddings import OllamaEmbeddings
+
+from .base import EmbeddingProvider
+
+
+class OllamaEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.client = OllamaEmbeddings(model=model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.embed_query(text)
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db.schema_catalog import SchemaSnapshot
+
+logger = get_logger("schema_embedding_index")
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def normalize_vector(vector) -> np.ndarray:
+    vec = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def table_of(key: str) -> str:
+    return key.split(".", 1)[0]
+
+
+def table_documents(snapshot: SchemaSnapshot, tables: Iterable[str]) -> Tuple[List[str], List[str]]:
+    keys, documents = [], []
+    for table_name in tables:
+        table = snapshot.tables[table_name]
+        parts = [table["table"]]
+        if table["comment"]:
+            parts.append(table["comment"])
+        parts.append("columns: " + ", ".join(col["name"] for col in table["columns"]))
+        keys.append(table["table"])
+        documents.append(". ".join(parts))
+    return keys, documents
+
+
+def column_documents(snapshot: SchemaSnapshot, tables: Iterable[str]) -> Tuple[List[str], List[str]]:
+    keys, documents = [], []
+    for table_name in tables:
+        table = snapshot.tables[table_name]
+        for col in table["columns"]:
+            document = f"{table['table']}.{col['name']} ({col['type']})"
+            if col["comment"]:
+                document += f": {col['comment']}"
+            keys.append(f"{table['table']}.{col['name']}")
+            documents.append(document)
+    return keys, documents
+
+
+class SchemaEmbeddingIndex:
+    """
+    Pre-normalized float32 matrix of schema element embeddings.
+
+    `documents_fn` turns tables of a schema snapshot into (keys, documents);
+    one row is embedded per document. The matrix is persisted as a .npy file
+    keyed by the embedding model and the schema fingerprint, and memory-mapped
+    on load, so ranking a query is a single matrix-vector product and restarts
+    never re-embed an unchanged schema.
+
+    When the schema changes, only rows of tables whose signature changed are
+    re-embedded. The new matrix is swapped in atomically, and callers keep
+    using the previous one while a rebuild is in progress.
+    """
+
+    def __init__(
+            self,
+            cache_dir: str,
+            kind: str,
+            documents_fn: Callable[[SchemaSnapshot, Iterable[str]], Tuple[List[str], List[str]]]
+    ):
+        self.cache_dir = cache_dir
+        self.kind = kind
+        self.documents_fn = documents_fn
+        self._lock = threading.Lock()
+        self._state: Tuple[Optional[str], List[str], Optional[np.ndarray], Dict[str, Any]] = (None, [], None, {})
+
+    @property
+    def key(self) -> Optional[str]:
+        return self._state[0]
+
+    @property
+    def names(self) -> List[str]:
+        return self._state[1]
+
+    @staticmethod
+    def index_key(snapshot: SchemaSnapshot, model_name: str) -> str:
+        return hashlib.sha256(f"{model_name}:{snapshot.fingerprint}".encode()).hexdigest()[:24]
+
+    def ensure(self, snapshot: SchemaSnapshot, embedder, model_name: str) -> "SchemaEmbeddingIndex":
+        key = self.index_key(snapshot, model_name)
+        if self.key == key:
+            return self
+
+        # Only the very first build blocks; later rebuilds serve the previous matrix meanwhile.
+        if not self._lock.acquire(blocking=self.key is None):
+            return self
+        try:
+            if self.key != key and not self._load(key):
+                self._build(key, snapshot, embedder, model_name)
+        finally:
+            self._lock.release()
+        return self
+
+    def score_all(self, query_vector) -> Tuple[List[str], np.ndarray]:
+        _, names, matrix, _ = self._state
+        if matrix is None or not names:
+            return [], np.zeros(0, dtype=np.float32)
+        return names, matrix @ normalize_vector(query_vector)
+
+    def search(self, query_vector, k: int) -> List[Tuple[str, float]]:
+        names, scores = self.score_all(query_vector)
+        if not names:
+            return []
+
+        k = min(k, len(names))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(names[i], float(scores[i])) for i in top]
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, f"{self.kind}_{key}")
+        return base + ".npy", base + ".json"
+
+    def _load(self, key: str) -> bool:
+        matrix_path, meta_path = self._paths(key)
+        if not (os.path.exists(matrix_path) and os.path.exists(meta_path)):
+            return False
+
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            names = meta["names"]
+            matrix = np.load(matrix_path, mmap_mode="r")
+        except Exception as e:
+            logger.warning(f"Discarding unreadable {self.kind} index {key}: {e}")
+            return False
+
+        if matrix.shape[0] != len(names):
+            logger.warning(f"Discarding inconsistent {self.kind} index {key}")
+            return False
+
+        self._state = (key, names, matrix, meta)
+        logger.info(f"Loaded {self.kind} index {key} from disk: {len(names)} rows")
+        return True
+
+    def _changed_tables(self, snapshot: SchemaSnapshot, model_name: str) -> Optional[set]:
+        _, names, matrix, meta = self._state
+        previous = meta.get("signatures")
+        if matrix is None or not names or previous is None or meta.get("model") != model_name:
+            return None
+
+        current = snapshot.table_signatures
+        changed = {table for table, signature in current.items() if previous.get(table) != signature}
+        return changed | (set(previous) - set(current))
+
+    def _build(self, key: str, snapshot: SchemaSnapshot, embedder, model_name: str):
+        changed = self._changed_tables(snapshot, model_name)
+        _, old_names, old_matrix, _ = self._state
+
+        if changed is None:
+            kept_rows = []
+            tables = snapshot.table_names
+        else:
+            kept_rows = [i for i, name in enumerate(old_names) if table_of(name) not in changed]
+            tables = [table for table in snapshot.table_names if table in changed]
+
+        new_names, documents = self.documents_fn(snapshot, tables)
+        logger.info(f"Embedding {len(documents)} {self.kind} rows ({len(kept_rows)} reused)...")
+
+        blocks, names = [], []
+        if kept_rows:
+            blocks.append(np.asarray(old_matrix[kept_rows], dtype=np.float32))
+            names.extend(old_names[i] for i in kept_rows)
+        if documents:
+            blocks.append(normalize_rows(np.asarray(embedder.embed_documents(documents), dtype=np.float32)))
+            names.extend(new_names)
+        matrix = np.vstack(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+
+        meta = {"names": names, "model": model_name, "signatures": snapshot.table_signatures}
+        self._save(key, matrix, meta)
+        self._state = (key, names, matrix, meta)
+        logger.info(f"{self.kind.capitalize()} index {key} built: {len(names)} rows")
+
+    def _save(self, key: str, matrix: np.ndarray, meta: Dict[str, Any]):
+        matrix_path, meta_path = self._paths(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_matrix = matrix_path + ".tmp.npy"
+            tmp_meta = meta_path + ".tmp"
+            np.save(tmp_matrix, matrix)
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_matrix, matrix_path)
+            os.replace(tmp_meta, meta_path)
+        except OSError as e:
+            logger.warning(f"Could not persist {self.kind} index {key}: {e}")
+
+
+TABLE_INDEX = SchemaEmbeddingIndex(settings.EMBEDDING_CACHE_DIR, "tables", table_documents)
+COLUMN_INDEX = SchemaEmbeddingIndex(settings.EMBEDDING_CACHE_DIR, "columns", column_documents)
@@ -0,0 +1,169 @@
+import asyncio
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+
+from app.agents.embeddings.base import EmbeddingProvider
+from app.agents.embeddings.local_provider import LocalEmbeddingProvider
+from app.agents.embeddings.ollama_provider import OllamaEmbeddingProvider
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.enums import EmbeddingBackend
+from app.utils.cache import TTLCache
+
+logger = get_logger("embedding_service")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+def build_embedding_provider(backend: EmbeddingBackend) -> EmbeddingProvider:
+    if backend == EmbeddingBackend.LOCAL:
+        return LocalEmbeddingProvider(
+            model_name=settings.LOCAL_EMBEDDING_MODEL,
+            device=settings.LOCAL_EMBEDDING_DEVICE,
+            workers=settings.LOCAL_EMBEDDING_WORKERS,
+            batch_size=settings.EMBEDDING_MAX_BATCH,
+        )
+    return OllamaEmbeddingProvider(model_name=settings.EMBEDDING_MODEL)
+
+
+class MicroBatcher:
+    """
+    Gathers concurrent single-text embed requests into one batch call.
+
+    The first caller to arrive becomes the leader: it waits up to `window`
+    seconds for others to join, then issues a single embed_documents call for
+    the whole batch and hands every waiter its own vector.
+    """
+
+    def __init__(self, embed_batch: Callable[[List[str]], List[List[float]]], window: float, max_batch: int):
+        self._embed_batch = embed_batch
+        self._window = window
+        self._max_batch = max_batch
+        self._lock = threading.Lock()
+        self._full = threading.Event()
+        self._pending: List[Tuple[str, Future]] = []
+        self._leader_waiting = False
+
+    def submit(self, text: str) -> List[float]:
+        future: Future = Future()
+
+        with self._lock:
+            self._pending.append((text, future))
+            is_leader = not self._leader_waiting
+            if is_leader:
+                self._leader_waiting = True
+                self._full.clear()
+            elif len(self._pending) >= self._max_batch:
+                self._full.set()
+
+        if is_leader:
+            if self._window > 0:
+                self._full.wait(self._window)
+            self._flush()
+
+        return future.result()
+
+    def _flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._leader_waiting = False
+
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = {}
+            for start in range(0, len(unique_texts), self._max_batch):
+                chunk = unique_texts[start:start + self._max_batch]
+                vectors.update(zip(chunk, self._embed_batch(chunk)))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        if len(batch) > 1:
+            logger.debug(f"Embedded {len(batch)} queries in one batch ({len(unique_texts)} unique)")
+        for text, future in batch:
+            future.set_result(vectors[text])
+
+
+class EmbeddingService:
+    """
+    Shared query-embedding layer.
+
+    Query vectors are cached in an LRU/TTL cache keyed on normalized text,
+    and cache misses arriving together are micro-batched into a single
+    embed_documents call. The underlying provider is built once.
+    """
+
+    def __init__(
+            self,
+            embedder_factory: Callable[[], EmbeddingProvider],
+            cache_size: int,
+            cache_ttl: float,
+            batch_window: float,
+            max_batch: int
+    ):
+        self._embedder_factory = embedder_factory
+        self._embedder = None
+        self._embedder_lock = threading.Lock()
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._batcher = MicroBatcher(self._embed_batch, window=batch_window, max_batch=max_batch)
+
+    @property
+    def embedder(self) -> EmbeddingProvider:
+        if self._embedder is None:
+            with self._embedder_lock:
+                if self._embedder is None:
+                    self._embedder = self._embedder_factory()
+        return self._embedder
+
+    @property
+    def model_name(self) -> str:
+        return self.embedder.model_name
+
+    def warm_up(self):
+        started = time.perf_counter()
+        self.embedder.warm_up()
+        logger.info(f"Embedding provider {self.model_name} warm in {time.perf_counter() - started:.2f}s")
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self.embedder.embed_documents(texts)
+
+    def _embed_uncached(self, key: str) -> List[float]:
+        started = time.perf_counter()
+        vector = self._batcher.submit(key)
+        self.cache.set(key, vector)
+        logger.debug(f"Query embedded in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return vector
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self._embed_uncached(key)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = await asyncio.to_thread(self._embed_uncached, key)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedder.embed_documents(texts)
+
+
+EMBEDDINGS = EmbeddingService(
+    embedder_factory=lambda: build_embedding_provider(EmbeddingBackend(settings.EMBEDDING_BACKEND)),
+    cache_size=settings.EMBEDDING_CACHE_SIZE,
+    cache_ttl=settings.EMBEDDING_CACHE_TTL_SECONDS,
+    batch_window=settings.EMBEDDING_BATCH_WINDOW_MS / 1000,
+    max_batch=settings.EMBEDDING_MAX_BATCH,
+)
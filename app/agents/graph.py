@@ -1,11 +1,16 @@
-from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import InMemorySaver
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, START, END
 
+from app.agents.checkpointer import CHECKPOINTER
 from app.agents.nodes.conversation_node import GenerateConversationalResponseNode
+from app.agents.nodes.credential_gate_node import CredentialGateNode
 from app.agents.nodes.credential_review_node import CredentialReviewNode
 from app.agents.nodes.execute_sql_query_node import ExecuteSQLQueryNode
+from app.agents.nodes.fan_in_node import FanInNode
 from app.agents.nodes.generate_sql_query_node import GenerateSQLQueryNode
 from app.agents.nodes.get_db_info_node import GetTableInfoNode
+from app.agents.nodes.intent_router_node import IntentRouterNode
+from app.agents.nodes.speculative_sql_node import SpeculativeSQLNode
 from app.agents.nodes.verify_credential_node import CheckUserCredentialsNode
 
 from app.agents.state import AgentState
@@ -16,11 +21,18 @@ from app.enums.routes import routes
 from app.enums.tool_call import toolcall
 
 logger = get_logger("build_graph")
+
+
+def async_node(name: str, node) -> RunnableLambda:
+    """Wrap a node so ainvoke/astream run its `acall` coroutine and invoke keeps the sync path."""
+    return RunnableLambda(node, afunc=node.acall, name=name)
+
+
 def build_graph():
     workflow = StateGraph(AgentState)
 
 
-    def route_after_get_db_info(state: AgentState) -> str:
+    def route_after_fan_in(state: AgentState) -> str:
         if state.get("can_answer_from_db") and state.get("need_to_interrupt"):
             logger.info("ROUTING TO HITL")
             return intents.HITL
@@ -28,39 +40,50 @@ def build_graph():
             logger.info("ROUTING TO GENERATE_SQL_QUERY_NODE")
             return intents.SQL_QUERY
         else:
-            logger.info(f"ROUTING TO {state.get("need_to_interrupt")}")
             logger.info("ROUTING TO GENERATE_CONVERSATIONAL_RESPONSE_NODE")
             return intents.GENERAL
 
-    def route_after_credential_review(state: AgentState) -> str:
+    def route_after_credential_review(state: AgentState):
         if state.get("credentials_approved", False) and state.get("credentials_reviewed", False):
-            logger.info("Credentials approved, proceeding to next step")
-            return routes.CHECK_USER_CREDENTIALS_NODE
+            # Member scope is bound at execution, so the SQL (usually generated during review) is taken in parallel.
+            logger.info("Credentials approved, verifying and generating SQL in parallel")
+            return [routes.CHECK_USER_CREDENTIALS_NODE, routes.SPECULATIVE_SQL_NODE]
         else:
             logger.info("Credentials not approved, returning to conversation")
             return routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE
 
-    def route_after_check_user_credendials_review(state: AgentState) -> str:
+    def route_after_credential_gate(state: AgentState) -> str:
         if state.get("credentials_valid", False):
-            logger.info("Credentials approved, proceeding to next step")
-            return routes.GENERATE_SQL_QUERY_NODE
+            logger.info("Credentials valid, executing generated SQL")
+            return routes.EXECUTE_SQL_QUERY_NODE
         else:
-            logger.info("Credentials not approved, returning to conversation")
+            logger.info("Credentials not valid, returning to conversation")
             return routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE
 
-    workflow.add_node(routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE, GenerateConversationalResponseNode())
-    workflow.add_node(routes.GET_TABLE_INFO_NODE, GetTableInfoNode())
-    workflow.add_node(routes.HUMAN_REVIEW_NODE, CredentialReviewNode())
-    workflow.add_node(routes.GENERATE_SQL_QUERY_NODE, GenerateSQLQueryNode())
-    workflow.add_node(routes.EXECUTE_SQL_QUERY_NODE, ExecuteSQLQueryNode())
-    workflow.add_node(routes.CHECK_USER_CREDENTIALS_NODE, CheckUserCredentialsNode())
-
-
-    workflow.set_entry_point(routes.GET_TABLE_INFO_NODE)
+    def add_node(name: str, node):
+        workflow.add_node(name, async_node(name, node))
+
+    add_node(routes.INTENT_ROUTER_NODE, IntentRouterNode())
+    add_node(routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE, GenerateConversationalResponseNode())
+    add_node(routes.GET_TABLE_INFO_NODE, GetTableInfoNode())
+    add_node(routes.LOOKUP_CREDENTIALS_NODE, CheckUserCredentialsNode())
+    add_node(routes.FAN_IN_NODE, FanInNode())
+    add_node(routes.HUMAN_REVIEW_NODE, CredentialReviewNode())
+    add_node(routes.GENERATE_SQL_QUERY_NODE, GenerateSQLQueryNode())
+    add_node(routes.SPECULATIVE_SQL_NODE, SpeculativeSQLNode())
+    add_node(routes.EXECUTE_SQL_QUERY_NODE, ExecuteSQLQueryNode())
+    add_node(routes.CHECK_USER_CREDENTIALS_NODE, CheckUserCredentialsNode())
+    add_node(routes.CREDENTIAL_GATE_NODE, CredentialGateNode())
+
+    # Intent routing, schema search and the credential lookup are independent; run them in one superstep.
+    start_branches = [routes.INTENT_ROUTER_NODE, routes.GET_TABLE_INFO_NODE, routes.LOOKUP_CREDENTIALS_NODE]
+    for branch in start_branches:
+        workflow.add_edge(START, branch)
+    workflow.add_edge(start_branches, routes.FAN_IN_NODE)
 
     workflow.add_conditional_edges(
-        routes.GET_TABLE_INFO_NODE,
-        route_after_get_db_info,
+        routes.FAN_IN_NODE,
+        route_after_fan_in,
         {
             intents.SQL_QUERY: routes.GENERATE_SQL_QUERY_NODE,
             intents.HITL: routes.HUMAN_REVIEW_NODE,
@@ -76,23 +99,24 @@ def build_graph():
         route_after_credential_review,
         {
             routes.CHECK_USER_CREDENTIALS_NODE: routes.CHECK_USER_CREDENTIALS_NODE,
+            routes.SPECULATIVE_SQL_NODE: routes.SPECULATIVE_SQL_NODE,
             routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE: routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE
         }
     )
+    workflow.add_edge([routes.CHECK_USER_CREDENTIALS_NODE, routes.SPECULATIVE_SQL_NODE], routes.CREDENTIAL_GATE_NODE)
     workflow.add_conditional_edges(
-        routes.CHECK_USER_CREDENTIALS_NODE,
-        route_after_check_user_credendials_review,
+        routes.CREDENTIAL_GATE_NODE,
+        route_after_credential_gate,
         {
-            routes.GENERATE_SQL_QUERY_NODE: routes.GENERATE_SQL_QUERY_NODE,
+            routes.EXECUTE_SQL_QUERY_NODE: routes.EXECUTE_SQL_QUERY_NODE,
             routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE: routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE
         }
     )
 
     workflow.add_edge(routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE, END)
 
-    memory = InMemorySaver()
     compiled_graph = workflow.compile(
-        checkpointer=memory,
+        checkpointer=CHECKPOINTER,
         interrupt_after=[routes.HUMAN_REVIEW_NODE]
     )
 
@@ -0,0 +1,143 @@
+import asyncio
+import contextvars
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from app.agents.llm_provider import get_llm
+from app.agents.llm_scheduler import llm_priority
+from app.agents.prompts.registry import PROMPTS
+from app.agents.state import AgentState
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.enums import AiModel, LLMPriority
+from app.enums.routes import routes
+from app.utils.cache import TTLCache
+from app.utils.tokens import count_tokens
+
+logger = get_logger("history_manager")
+
+# node -> (token budget, max turns or None, prepend the rolling summary)
+NODE_BUDGETS: Dict[str, Tuple[int, Optional[int], bool]] = {
+    routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE: (settings.HISTORY_TOKENS_CONVERSATION, None, True),
+    routes.HUMAN_REVIEW_NODE: (settings.HISTORY_TOKENS_CREDENTIAL_REVIEW, None, True),
+    routes.GENERATE_SQL_QUERY_NODE: (
+        settings.HISTORY_TOKENS_SQL_GENERATOR, settings.HISTORY_TURNS_SQL_GENERATOR, False
+    ),
+}
+
+
+def _content(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+
+class HistoryManager:
+    """
+    Token-budgeted view of a thread's message history.
+
+    Each node gets the newest turns that fit its budget, optionally preceded
+    by a rolling summary of older turns. The summary is refreshed by a
+    background task once enough messages have fallen out of the window, so
+    no request waits on it; until it catches up, the last summary is used.
+    """
+
+    def __init__(self, summary_cache_size: int, summary_ttl: float, min_summary_messages: int):
+        self.min_summary_messages = min_summary_messages
+        self.summaries = TTLCache(maxsize=summary_cache_size, ttl=summary_ttl)
+        self._pending: set = set()
+        self._tasks: set = set()
+
+    @staticmethod
+    def thread_key(state: AgentState) -> str:
+        return f"{state.get('session_id')}_conv_{state.get('conversation_id')}"
+
+    def for_node(self, state: AgentState, node: str) -> List[BaseMessage]:
+        max_tokens, max_turns, with_summary = NODE_BUDGETS.get(
+            node, (settings.HISTORY_TOKENS_CONVERSATION, None, True)
+        )
+        return self.window(state, max_tokens, max_turns, with_summary)
+
+    def window(
+            self,
+            state: AgentState,
+            max_tokens: int,
+            max_turns: Optional[int] = None,
+            with_summary: bool = True
+    ) -> List[BaseMessage]:
+        messages = list(state.get("messages") or [])
+        start = self._window_start(messages, max_tokens, max_turns)
+        if start == 0:
+            return messages
+
+        window = messages[start:]
+        if not with_summary:
+            return window
+
+        key = self.thread_key(state)
+        entry = self.summaries.get(key)
+        self._schedule_summary(key, messages, start, entry)
+        if entry is None:
+            return window
+
+        logger.debug(f"History for {key}: summary of {entry[1]} messages + {len(window)} recent")
+        return [SystemMessage(content=f"Summary of the earlier conversation: {entry[0]}"), *window]
+
+    @staticmethod
+    def _window_start(messages: List[BaseMessage], max_tokens: int, max_turns: Optional[int]) -> int:
+        start = len(messages)
+        tokens = 0
+        turns = 0
+        for i in range(len(messages) - 1, -1, -1):
+            tokens += count_tokens(_content(messages[i]))
+            if tokens > max_tokens:
+                break
+            if isinstance(messages[i], HumanMessage):
+                turns += 1
+                if max_turns is not None and turns > max_turns:
+                    break
+            start = i
+
+        # Never open the window in the middle of a turn.
+        while start < len(messages) and not isinstance(messages[start], HumanMessage):
+            start += 1
+        return start
+
+    def _schedule_summary(self, key: str, messages: List[BaseMessage], start: int, entry):
+        summary, covered = entry if entry is not None else ("", 0)
+        if start - covered < self.min_summary_messages or key in self._pending:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self._pending.add(key)
+        # A fresh context keeps the summary call out of the caller's callbacks and event stream.
+        task = loop.create_task(
+            self._summarize(key, summary, messages[covered:start], start),
+            context=contextvars.Context()
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _summarize(self, key: str, summary: str, new_messages: List[BaseMessage], covered: int):
+        try:
+            transcript = "\n".join(f"{message.type}: {_content(message)}" for message in new_messages)
+            prompt = PROMPTS.messages("history_summary", summary=summary or "(none)", transcript=transcript)
+            llm = get_llm(temperature=0, model=AiModel.GPT_5_NANO)
+            with llm_priority(LLMPriority.LOW):
+                response = await llm.ainvoke(prompt)
+            PROMPTS.record_usage("history_summary", response)
+            self.summaries.set(key, (response.content.strip(), covered))
+            logger.info(f"History summary for {key} now covers {covered} messages")
+        except Exception as e:
+            logger.warning(f"History summary for {key} failed: {e}")
+        finally:
+            self._pending.discard(key)
+
+
+HISTORY = HistoryManager(
+    summary_cache_size=settings.HISTORY_SUMMARY_CACHE_SIZE,
+    summary_ttl=settings.HISTORY_SUMMARY_TTL_SECONDS,
+    min_summary_messages=settings.HISTORY_SUMMARY_MIN_MESSAGES,
+)
@@ -1,21 +1,138 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
 from langchain_community.chat_models import ChatOllama
 from langchain_openai import ChatOpenAI
+
+from app.agents.cache.llm_cache import resolve_cache
+from app.agents.llm_resilience import ResilientChatModel
+from app.agents.llm_scheduler import LLM_SCHEDULER, ScheduledChatModel
 from app.core.config import settings
+from app.core.logger import get_logger
 from app.enums import AiModel
 
-def get_llm(temperature: float = 0, model: AiModel = AiModel.GPT_5_NANO):
-        if not settings.OPENAI_API_KEY:
-            raise ValueError("OpenAI API key not configured")
+logger = get_logger("llm_provider")
+
+OLLAMA_MODELS = (AiModel.GEMMA3, AiModel.LLAMA3_2)
+
+
+class LLMClientRegistry:
+    """
+    Process-wide registry of long-lived chat model clients.
+
+    Clients are keyed by (model, temperature, options) and built once. All
+    OpenAI clients share one sync and one async httpx pool, so keep-alive
+    connections and TLS sessions are reused across nodes and requests.
+
+    get() returns a ResilientChatModel (deadlines, hedging, model fallback)
+    whose attempts go through ScheduledChatModel clients, so every async
+    call passes the per-model admission control of LLM_SCHEDULER.
+
+    Passing `cache=True` memoizes calls in memory and on disk, for prompts
+    free of member data only (the SQL generator's first-turn prompt);
+    `cache="memory"` keeps them in memory only (see LLMCallCache).
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+
+    @staticmethod
+    def _limits() -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+        )
+
+    @staticmethod
+    def _timeout() -> httpx.Timeout:
+        return httpx.Timeout(settings.LLM_HTTP_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS)
+
+    @property
+    def http_client(self) -> httpx.Client:
+        if self._http_client is None:
+            self._http_client = httpx.Client(limits=self._limits(), timeout=self._timeout())
+        return self._http_client
+
+    @property
+    def http_async_client(self) -> httpx.AsyncClient:
+        if self._http_async_client is None:
+            self._http_async_client = httpx.AsyncClient(limits=self._limits(), timeout=self._timeout())
+        return self._http_async_client
+
+    def get(self, temperature: float, model: AiModel, **options):
+        """Resilient client: timeouts, hedging and fallback over scheduled clients."""
+        key = ("resilient", AiModel(model), temperature, tuple(sorted(options.items())))
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = ResilientChatModel(
+                        key[1], lambda fallback: self.scheduled(temperature, fallback, **options)
+                    )
+                    self._clients[key] = client
+        return client
+
+    def scheduled(self, temperature: float, model: AiModel, **options):
+        key = (AiModel(model), temperature, tuple(sorted(options.items())))
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = ScheduledChatModel(self._build(key[0], temperature, **options), key[0], LLM_SCHEDULER)
+                self._clients[key] = client
+                logger.info(f"Created LLM client {key[0].value} (temperature={temperature}, options={options})")
+        return client
+
+    def _build(self, model: AiModel, temperature: float, **options):
+        cache = resolve_cache(options.pop("cache", None))
+        if cache is not None:
+            options["cache"] = cache
 
         if model == AiModel.GPT_5_NANO:
+            if not settings.OPENAI_API_KEY:
+                raise ValueError("OpenAI API key not configured")
+
             return ChatOpenAI(
-                model= model,
+                model=model,
                 temperature=temperature,
-                openai_api_key=settings.OPENAI_API_KEY
+                openai_api_key=settings.OPENAI_API_KEY,
+                http_client=self.http_client,
+                http_async_client=self.http_async_client,
+                # 429s are retried by the scheduler lane, which owns the cooldown and concurrency accounting.
+                max_retries=0,
+                **options
             )
 
-        elif model == AiModel.GEMMA3:
-            return ChatOllama (
+        elif model in OLLAMA_MODELS:
+            return ChatOllama(
                 model=model,
-                temperature=temperature
-            )
\ No newline at end of file
+                temperature=temperature,
+                **options
+            )
+
+        raise ValueError(f"Unsupported model: {model}")
+
+    async def aclose(self):
+        if self._http_async_client is not None:
+            await self._http_async_client.aclose()
+        if self._http_client is not None:
+            self._http_client.close()
+        self._http_client = None
+        self._http_async_client = None
+        self._clients.clear()
+
+
+LLM_CLIENTS = LLMClientRegistry()
+
+
+def get_llm(temperature: float = 0, model: AiModel = AiModel.GPT_5_NANO, **options):
+    return LLM_CLIENTS.get(temperature, model, **options)
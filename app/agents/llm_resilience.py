@@ -0,0 +1,322 @@
+import asyncio
+import contextvars
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables.config import ensure_config, merge_configs, var_child_runnable_config
+
+from app.agents.llm_scheduler import LLMOverloadedError
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.enums import AiModel
+from app.enums.routes import routes
+
+logger = get_logger("llm_resilience")
+
+NODE_TIMEOUTS: Dict[str, float] = {
+    routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE: settings.LLM_TIMEOUT_CONVERSATION_SECONDS,
+    routes.GENERATE_SQL_QUERY_NODE: settings.LLM_TIMEOUT_SQL_GENERATOR_SECONDS,
+    routes.SPECULATIVE_SQL_NODE: settings.LLM_TIMEOUT_SQL_GENERATOR_SECONDS,
+    routes.HUMAN_REVIEW_NODE: settings.LLM_TIMEOUT_CREDENTIAL_REVIEW_SECONDS,
+}
+
+FALLBACKS: Dict[AiModel, List[AiModel]] = {
+    AiModel.GPT_5_NANO: [AiModel.GEMMA3, AiModel.LLAMA3_2],
+    AiModel.GEMMA3: [AiModel.GPT_5_NANO, AiModel.LLAMA3_2],
+    AiModel.LLAMA3_2: [AiModel.GPT_5_NANO, AiModel.GEMMA3],
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised when every model in the fallback chain is unavailable."""
+
+
+def node_timeout() -> float:
+    """Timeout budget of the graph node this call runs in, read from the runnable config."""
+    node = ensure_config().get("metadata", {}).get("langgraph_node")
+    return NODE_TIMEOUTS.get(node, settings.LLM_TIMEOUT_SECONDS)
+
+
+def detached_context() -> contextvars.Context:
+    """Copy of the current context without LangChain callbacks, so a hedge is not traced or streamed."""
+    context = contextvars.copy_context()
+    context.run(var_child_runnable_config.set, None)
+    return context
+
+
+class StreamWatch(BaseCallbackHandler):
+    """Notes whether a call has already streamed tokens to the client."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.streamed = False
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        if token:
+            self.streamed = True
+
+
+class CircuitBreaker:
+    """
+    Rolling-window breaker for one model.
+
+    Errors, timeouts and calls slower than `slow_call_seconds` count as
+    failures. Once the failure rate over the last `window` calls reaches
+    `failure_rate`, the breaker opens for `open_seconds`; then a single probe
+    call is let through and its outcome closes or re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, window: int, min_calls: int, failure_rate: float,
+                 slow_call_seconds: float, open_seconds: float):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self._outcomes = deque(maxlen=window)
+        self._probe_in_flight = False
+        self.trips = 0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def cancel_probe(self):
+        """A half-open probe ended without an outcome (cancelled or never admitted)."""
+        self._probe_in_flight = False
+
+    def record(self, ok: bool, latency: float = 0.0):
+        failed = not ok or latency > self.slow_call_seconds
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+            if failed:
+                self._open()
+            else:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+                logger.info(f"Circuit for {self.name} closed")
+            return
+
+        self._outcomes.append(failed)
+        if len(self._outcomes) >= self.min_calls and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._outcomes.clear()
+        logger.warning(f"Circuit for {self.name} opened for {self.open_seconds:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "trips": self.trips, "recent_failures": sum(self._outcomes)}
+
+
+class LatencyTracker:
+    def __init__(self, size: int = 200):
+        self._samples: Dict[AiModel, deque] = {}
+        self._size = size
+
+    def record(self, model: AiModel, seconds: float):
+        self._samples.setdefault(model, deque(maxlen=self._size)).append(seconds)
+
+    def percentile(self, model: AiModel, q: float) -> Optional[float]:
+        samples = sorted(self._samples.get(model, ()))
+        if not samples:
+            return None
+        return samples[min(int(len(samples) * q), len(samples) - 1)]
+
+    def hedge_delay(self, model: AiModel) -> Optional[float]:
+        if not settings.LLM_HEDGE_ENABLED or len(self._samples.get(model, ())) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return max(self.percentile(model, 0.95), settings.LLM_HEDGE_MIN_DELAY_SECONDS)
+
+
+BREAKERS: Dict[AiModel, CircuitBreaker] = {
+    model: CircuitBreaker(
+        model.value,
+        window=settings.LLM_BREAKER_WINDOW,
+        min_calls=settings.LLM_BREAKER_MIN_CALLS,
+        failure_rate=settings.LLM_BREAKER_FAILURE_RATE,
+        slow_call_seconds=settings.LLM_BREAKER_SLOW_CALL_SECONDS,
+        open_seconds=settings.LLM_BREAKER_OPEN_SECONDS,
+    )
+    for model in AiModel
+}
+LATENCY = LatencyTracker()
+HEDGE_STATS = {"hedged": 0, "hedge_won": 0, "hedge_skipped": 0, "timeouts": 0, "queue_timeouts": 0,
+               "fallbacks": 0, "no_fallback_after_stream": 0}
+
+
+class ResilientChatModel:
+    """
+    Chat model proxy adding deadlines, hedging and model failover to `ainvoke`.
+
+    Each attempt is bounded by the calling node's timeout budget, counted
+    from when the scheduler admits it; queue waits and rate-limit cooldowns
+    are the scheduler's to bound and never count against the model. Once a
+    model has enough latency samples, a duplicate request is sent if the
+    admitted first call has not answered within its p95 (unless the lane is
+    saturated or tokens are already streaming), and the first answer wins.
+    When a model fails, times out or has its circuit open, the call moves on
+    to the next model in FALLBACKS, unless tokens were already streamed to
+    the client. Sync `invoke` goes straight to the primary.
+    """
+
+    def __init__(self, model: AiModel, client_for: Callable[[AiModel], Any]):
+        self.model = AiModel(model)
+        self._client_for = client_for
+
+    @property
+    def llm(self):
+        return self._client_for(self.model)
+
+    def invoke(self, input, config=None, **kwargs):
+        return self.llm.invoke(input, config, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self.llm, name)
+
+    def _chain(self) -> List[AiModel]:
+        if not settings.LLM_FALLBACK_ENABLED:
+            return [self.model]
+        return [self.model, *FALLBACKS.get(self.model, [])]
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        timeout = node_timeout()
+        watch = StreamWatch()
+        watched_config = merge_configs(ensure_config(config), {"callbacks": [watch]})
+        last_error: Optional[BaseException] = None
+
+        for model in self._chain():
+            breaker = BREAKERS[model]
+            if not breaker.allow():
+                continue
+            try:
+                client = self._client_for(model)
+            except Exception as e:
+                logger.debug(f"Fallback model {model.value} unavailable: {e}")
+                continue
+
+            if model != self.model:
+                HEDGE_STATS["fallbacks"] += 1
+                logger.warning(f"Falling back from {self.model.value} to {model.value}: {last_error!r}")
+
+            try:
+                result, latency = await self._hedged(
+                    client, model, input, watched_config, config, kwargs, timeout, watch
+                )
+            except LLMOverloadedError as e:
+                # Local queueing, not a provider fault: shed load to the next model.
+                HEDGE_STATS["queue_timeouts"] += 1
+                breaker.cancel_probe()
+                last_error = e
+            except asyncio.CancelledError:
+                breaker.cancel_probe()
+                raise
+            except asyncio.TimeoutError as e:
+                HEDGE_STATS["timeouts"] += 1
+                breaker.record(False)
+                last_error = e
+            except Exception as e:
+                breaker.record(False)
+                last_error = e
+            else:
+                breaker.record(True, latency)
+                LATENCY.record(model, latency)
+                return result
+
+            if watch.streamed:
+                # The client already has part of this answer; another model would send a second copy.
+                HEDGE_STATS["no_fallback_after_stream"] += 1
+                raise last_error
+
+        if last_error is not None:
+            raise last_error
+        raise CircuitOpenError(f"No model available for {self.model.value}: all circuits open")
+
+    @staticmethod
+    async def _attempt(client, input, config, kwargs, timeout: float,
+                       admitted: Optional[asyncio.Event] = None) -> Tuple[Any, float]:
+        """One call; returns the result and the provider time from admission to answer."""
+        admitted_at = time.monotonic()
+
+        def on_admitted():
+            nonlocal admitted_at
+            admitted_at = time.monotonic()
+            if admitted is not None:
+                admitted.set()
+
+        result = await client.ainvoke(input, config, timeout=timeout, on_admitted=on_admitted, **kwargs)
+        return result, time.monotonic() - admitted_at
+
+    async def _hedged(self, client, model: AiModel, input, config, hedge_config, kwargs, timeout: float,
+                      watch: StreamWatch) -> Tuple[Any, float]:
+        admitted = asyncio.Event()
+        first = asyncio.ensure_future(self._attempt(client, input, config, kwargs, timeout, admitted))
+        tasks = [first]
+        gate = None
+        try:
+            delay = LATENCY.hedge_delay(model)
+            if delay is None:
+                return await first
+
+            # The hedge clock starts at admission: time spent queueing is not a slow provider.
+            gate = asyncio.ensure_future(admitted.wait())
+            await asyncio.wait([first, gate], return_when=asyncio.FIRST_COMPLETED)
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                if watch.streamed or client.saturated:
+                    HEDGE_STATS["hedge_skipped"] += 1
+                    return await first
+                HEDGE_STATS["hedged"] += 1
+                second = asyncio.get_running_loop().create_task(
+                    self._attempt(client, input, hedge_config, kwargs, timeout), context=detached_context()
+                )
+                tasks.append(second)
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+            winner = done.pop()
+            if winner is not first and watch.streamed and not first.done():
+                # The client is reading the first answer's tokens; the final text must be that answer.
+                await asyncio.wait([first])
+                if first.exception() is None:
+                    winner = first
+            if winner.exception() is not None:
+                remaining = [task for task in tasks if task is not winner]
+                if remaining:
+                    winner = remaining[0]
+                    await asyncio.wait([winner])
+            if winner is not first:
+                HEDGE_STATS["hedge_won"] += 1
+            return winner.result()
+        finally:
+            if gate is not None:
+                gate.cancel()
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+
+
+def resilience_stats() -> Dict[str, Any]:
+    return {
+        **HEDGE_STATS,
+        "circuits": {model.value: breaker.stats() for model, breaker in BREAKERS.items()},
+        "p95_seconds": {model.value: LATENCY.percentile(model, 0.95) for model in AiModel},
+    }
@@ -0,0 +1,251 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.enums import AiModel, LLMPriority
+
+logger = get_logger("llm_scheduler")
+
+T = TypeVar("T")
+
+_PRIORITY: ContextVar[LLMPriority] = ContextVar("llm_priority", default=LLMPriority.NORMAL)
+
+
+@contextmanager
+def llm_priority(priority: LLMPriority):
+    """Run LLM calls made inside this block (and the graph tasks it spawns) at `priority`."""
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+class LLMOverloadedError(Exception):
+    """Raised when a call cannot be admitted: the wait queue is full or its deadline passed."""
+
+
+def is_rate_limited(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ == "RateLimitError"
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class ModelLane:
+    """
+    Admission control for one model: at most `max_concurrency` calls run at
+    once, up to `max_queue` wait in priority order, and a 429 puts the whole
+    lane into a cooldown so queued calls back off together instead of each
+    retrying on its own.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.cooldown_until = 0.0
+        self._backoff_level = 0
+        self._waiters: List[list] = []
+        self._seq = itertools.count()
+        self._waits = deque(maxlen=1024)
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.rate_limited = 0
+        self.max_queue_depth = 0
+
+    async def acquire(self, priority: LLMPriority, deadline: float):
+        started = time.monotonic()
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+        else:
+            await self._wait_for_slot(priority, deadline)
+
+        delay = self.cooldown_until - time.monotonic()
+        if delay > 0:
+            if time.monotonic() + delay > deadline:
+                self.release()
+                self.timed_out += 1
+                raise LLMOverloadedError(f"{self.name} is rate limited for another {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        self.admitted += 1
+        self._waits.append(time.monotonic() - started)
+
+    async def _wait_for_slot(self, priority: LLMPriority, deadline: float):
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise LLMOverloadedError(f"{self.name} queue is full ({self.max_queue} waiting)")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [int(priority), next(self._seq), future]
+        heapq.heappush(self._waiters, entry)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+
+        try:
+            await asyncio.wait_for(future, timeout=max(deadline - time.monotonic(), 0))
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up: pass it on.
+                self.release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                raise LLMOverloadedError(f"{self.name} queue wait exceeded its deadline") from e
+            raise
+
+    @property
+    def saturated(self) -> bool:
+        """A new call would have to queue."""
+        return self.active >= self.max_concurrency or bool(self._waiters)
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def penalize(self, hint: Optional[float]) -> float:
+        self.rate_limited += 1
+        self._backoff_level = min(self._backoff_level + 1, 8)
+        delay = hint if hint is not None else min(
+            settings.LLM_RATE_LIMIT_MAX_BACKOFF_SECONDS,
+            settings.LLM_RATE_LIMIT_BACKOFF_SECONDS * 2 ** (self._backoff_level - 1)
+        ) * (1 + random.random() * 0.25)
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + delay)
+        return delay
+
+    def recover(self):
+        self._backoff_level = 0
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+        return {
+            "active": self.active,
+            "queue_depth": len(self._waiters),
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "rate_limited": self.rate_limited,
+            "cooling_down_seconds": round(max(self.cooldown_until - time.monotonic(), 0.0), 2),
+            "wait_ms_p50": round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+            "wait_ms_p95": round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else 0.0,
+            "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0,
+        }
+
+
+class LLMScheduler:
+    def __init__(self, limits: Dict[AiModel, int], max_queue: int, queue_timeout: float, max_retries: int):
+        self._lanes = {model: ModelLane(model.value, limit, max_queue) for model, limit in limits.items()}
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+
+    def lane(self, model: AiModel) -> ModelLane:
+        return self._lanes[AiModel(model)]
+
+    async def run(
+            self,
+            model: AiModel,
+            call: Callable[[], Awaitable[T]],
+            timeout: Optional[float] = None,
+            on_admitted: Optional[Callable[[], None]] = None
+    ) -> T:
+        """
+        Run `call` once the model's lane admits it.
+
+        `timeout` bounds the call itself, not the queue wait or a rate-limit
+        cooldown (those raise LLMOverloadedError). `on_admitted` fires each
+        time the call is admitted, so callers can time only the provider.
+        """
+        lane = self.lane(model)
+        priority = _PRIORITY.get()
+        attempt = 0
+        while True:
+            await lane.acquire(priority, time.monotonic() + self.queue_timeout)
+            try:
+                if on_admitted is not None:
+                    on_admitted()
+                result = await (asyncio.wait_for(call(), timeout) if timeout else call())
+                lane.recover()
+                return result
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                delay = lane.penalize(retry_after(e))
+                logger.warning(f"{lane.name} rate limited, cooling down {delay:.1f}s (retry {attempt}/{self.max_retries})")
+            finally:
+                lane.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {model.value: lane.stats() for model, lane in self._lanes.items()}
+
+
+class ScheduledChatModel:
+    """
+    Chat model proxy whose async calls go through the LLM scheduler.
+
+    Sync `invoke` is passed straight through; every other attribute is
+    delegated to the wrapped model.
+    """
+
+    def __init__(self, llm, model: AiModel, scheduler: LLMScheduler):
+        self.llm = llm
+        self.model = AiModel(model)
+        self.scheduler = scheduler
+
+    def invoke(self, input, config=None, **kwargs):
+        return self.llm.invoke(input, config, **kwargs)
+
+    async def ainvoke(
+            self,
+            input,
+            config=None,
+            *,
+            timeout: Optional[float] = None,
+            on_admitted: Optional[Callable[[], None]] = None,
+            **kwargs
+    ):
+        return await self.scheduler.run(
+            self.model, lambda: self.llm.ainvoke(input, config, **kwargs), timeout=timeout, on_admitted=on_admitted
+        )
+
+    @property
+    def saturated(self) -> bool:
+        return self.scheduler.lane(self.model).saturated
+
+    def __getattr__(self, name: str):
+        return getattr(self.llm, name)
+
+
+LLM_SCHEDULER = LLMScheduler(
+    limits={
+        AiModel.GPT_5_NANO: settings.LLM_MAX_CONCURRENCY_OPENAI,
+        AiModel.GEMMA3: settings.LLM_MAX_CONCURRENCY_OLLAMA,
+        AiModel.LLAMA3_2: settings.LLM_MAX_CONCURRENCY_OLLAMA,
+    },
+    max_queue=settings.LLM_QUEUE_MAX,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+    max_retries=settings.LLM_RATE_LIMIT_RETRIES,
+)
@@ -1,102 +1,149 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage
 
+from app.agents.cache.semantic_cache import ANSWER_CACHE, is_context_dependent
+from app.agents.content_store import CONTENT_STORE
+from app.agents.embeddings.service import EMBEDDINGS
+from app.agents.history_manager import HISTORY
 from app.agents.llm_provider import get_llm
 from app.agents.prompts.registry import PROMPTS
 from app.agents.state import AgentState
 from app.enums import AiModel
+from app.core.config import settings
 from app.core.logger import get_logger
 import json
 
 from app.enums.intent import intents
+from app.enums.routes import routes
 
 logger = get_logger("conversational_response_node")
 
+SQL_RESULT_ERROR = "something went wrong getting the sql results"
+
+TEMPLATES = {
+    intents.GENERAL: "general_chat",
+    intents.SQL_QUERY: "sql_result_natural",
+    intents.REJECTED: "sql_rejected",
+}
+
 
 class GenerateConversationalResponseNode:
     def __init__(self):
         pass
 
-    def __call__(self, state: AgentState) -> Dict[str, Any]:
+    @staticmethod
+    def _template(state: AgentState) -> str:
+        return TEMPLATES.get(state.get("intent"), "fallback")
+
+    def _prepare(self, state: AgentState) -> Tuple[Optional[List], Optional[str], bool]:
+        """Build the LLM messages for this turn (and whether they carry history), or a canned reply instead."""
         intent = state.get("intent")
         logger.info(f"Intent received: {intent}")
-        llm = get_llm(temperature=0, model=AiModel.GPT_5_NANO)
 
-        conversation_history = state.get("messages", [])
+        conversation_history = HISTORY.for_node(state, routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE)
         user_message = state.get("user_query", "")
+        template = self._template(state)
 
-        if intent == intents.GENERAL:
-            #llm = get_llm(temperature=0, model=AiModel.GEMMA3)
-            system_prompt = PROMPTS.get("general_chat").format(
-                query=user_message
-            )
-            messages = [
-                SystemMessage(content=system_prompt),
-                *conversation_history
-            ]
-
-            response = llm.invoke(messages)
-            logger.info(f"IGeneral chat response: {response}")
-
-        elif intent == intents.SQL_QUERY:
-            query_result = state.get("tool_results")
-            query_result_text = json.dumps(query_result, indent=2)
-            if query_result:
-                system_prompt = PROMPTS.get("sql_result_natural").format(
-                    query=user_message,
-                    query_result=query_result_text
-                )
-                messages = [
-                    SystemMessage(content=system_prompt),
-                    *conversation_history
-                ]
-
-                response = llm.invoke(messages)
-                logger.info(f"sql_result_natural chat response: {response}")
-            else:
-                response = "something went wrong getting the sql results"
+        if intent == intents.SQL_QUERY:
+            query_result = CONTENT_STORE.get(state.get("tool_results_ref"))
+            if not query_result:
+                return None, SQL_RESULT_ERROR, False
+            prompt_vars = {"query": user_message, "query_result": json.dumps(query_result, indent=2)}
 
         elif intent == intents.REJECTED:
-            query_result = state.get("tool_results")
-            query_result_text = json.dumps(query_result, indent=2)
-            if query_result:
-                system_prompt = PROMPTS.get("sql_rejected").format(
-                    user_query=user_message,
-                    sql_query=query_result_text
-                )
-
-                messages = [
-                    SystemMessage(content=system_prompt),
-                    *conversation_history
-                ]
-                logger.error(f"sql_result_natural chat response: {messages}")
-                response = llm.invoke(messages)
-                logger.info(f"sql_result_natural chat response: {response}")
-            else:
-                response = "something went wrong getting the sql results"
+            query_result = CONTENT_STORE.get(state.get("tool_results_ref"))
+            if not query_result:
+                return None, SQL_RESULT_ERROR, False
+            prompt_vars = {"user_query": user_message, "sql_query": json.dumps(query_result, indent=2)}
 
         else:
-            system_prompt = PROMPTS.get("fallback").format(
-                query=user_message
-            )
-            messages = [
-                SystemMessage(content=system_prompt),
-                *conversation_history
-            ]
+            if intent != intents.GENERAL:
+                logger.info(f"Fallback response generated for unknown intent")
+            prompt_vars = {"query": user_message}
 
-            response = llm.invoke(messages)
-            logger.info(f"Fallback response generated for unknown intent")
+        return PROMPTS.messages(template, conversation_history, **prompt_vars), None, bool(conversation_history)
 
-        logger.info(f"Generated response: {response.content[:100]}...")
+    def _result(self, state: AgentState, content: str) -> Dict[str, Any]:
+        logger.info(f"Generated response: {content[:100]}...")
 
         new_messages = [
-            HumanMessage(content=user_message),
-            AIMessage(content=response.content)
+            HumanMessage(content=state.get("user_query", "")),
+            AIMessage(content=content)
         ]
 
         return {
-            "response": response.content.strip(),
+            "response": content.strip(),
             "messages": new_messages,
             "current_node": "GenerateConversationalResponseNode"
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def _cacheable(state: AgentState) -> bool:
+        """General-chat answers are cached unless the query leans on earlier turns."""
+        if not settings.ANSWER_CACHE_ENABLED or state.get("intent") != intents.GENERAL:
+            return False
+        if is_context_dependent(state.get("user_query", ""), state.get("messages", [])):
+            ANSWER_CACHE.record_bypass()
+            return False
+        return True
+
+    def _cache_vector(self, state: AgentState):
+        if not self._cacheable(state):
+            return None
+        try:
+            return EMBEDDINGS.embed_query(state.get("user_query", ""))
+        except Exception as e:
+            logger.warning(f"Answer cache skipped, embedding failed: {e}")
+            return None
+
+    async def _acache_vector(self, state: AgentState):
+        if not self._cacheable(state):
+            return None
+        try:
+            return await EMBEDDINGS.aembed_query(state.get("user_query", ""))
+        except Exception as e:
+            logger.warning(f"Answer cache skipped, embedding failed: {e}")
+            return None
+
+    @staticmethod
+    def _cached_answer(state: AgentState, query_vec) -> Optional[str]:
+        if query_vec is None:
+            return None
+        return ANSWER_CACHE.lookup(state.get("user_query", ""), query_vec)
+
+    @staticmethod
+    def _remember(state: AgentState, query_vec, reply: str, with_history: bool):
+        # An answer written with this session's history may quote it; it is not for other sessions.
+        if query_vec is not None and reply and not with_history:
+            ANSWER_CACHE.put(state.get("user_query", ""), query_vec, reply)
+
+    def __call__(self, state: AgentState) -> Dict[str, Any]:
+        query_vec = self._cache_vector(state)
+        cached = self._cached_answer(state, query_vec)
+        if cached is not None:
+            return self._result(state, cached)
+
+        messages, reply, with_history = self._prepare(state)
+        if messages is not None:
+            response = get_llm(temperature=0, model=AiModel.GPT_5_NANO, cache="memory").invoke(messages)
+            PROMPTS.record_usage(self._template(state), response)
+            reply = response.content
+            self._remember(state, query_vec, reply, with_history)
+        return self._result(state, reply)
+
+    async def acall(self, state: AgentState) -> Dict[str, Any]:
+        query_vec = await self._acache_vector(state)
+        cached = self._cached_answer(state, query_vec)
+        if cached is not None:
+            return self._result(state, cached)
+
+        # Pull the SQL result into memory off the event loop if this worker has not seen it yet.
+        await CONTENT_STORE.aget(state.get("tool_results_ref"))
+        messages, reply, with_history = self._prepare(state)
+        if messages is not None:
+            response = await get_llm(temperature=0, model=AiModel.GPT_5_NANO, cache="memory").ainvoke(messages)
+            PROMPTS.record_usage(self._template(state), response)
+            reply = response.content
+            self._remember(state, query_vec, reply, with_history)
+        return self._result(state, reply)
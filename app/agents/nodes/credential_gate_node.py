@@ -0,0 +1,38 @@
+from typing import Dict, Any
+
+from app.agents.state import AgentState
+from app.core.logger import get_logger
+from app.enums.intent import intents
+
+logger = get_logger("credential_gate_node")
+
+
+class CredentialGateNode:
+    """
+    Joins credential verification and the SQL generated alongside it after approval.
+
+    The query only goes on to execution once the member is verified;
+    otherwise the generated SQL is dropped and the user is told why.
+    """
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def _result(state: AgentState) -> Dict[str, Any]:
+        if state.get("credentials_valid", False):
+            return {"need_to_interrupt": False, "current_node": "CredentialGateNode"}
+
+        logger.info("Credentials could not be verified, discarding generated SQL")
+        return {
+            "sql_query": "",
+            "intent": intents.CREDENTIALS_CHECK,
+            "need_to_interrupt": True,
+            "current_node": "CredentialGateNode"
+        }
+
+    def __call__(self, state: AgentState) -> Dict[str, Any]:
+        return self._result(state)
+
+    async def acall(self, state: AgentState) -> Dict[str, Any]:
+        return self._result(state)
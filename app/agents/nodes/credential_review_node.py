@@ -1,12 +1,13 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 import json
 
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from app.agents.history_manager import HISTORY
 from app.agents.llm_provider import get_llm
 from app.agents.prompts.registry import PROMPTS
 from app.agents.state import AgentState
 from app.core.logger import get_logger
 from app.enums import AiModel
+from app.enums.routes import routes
 
 logger = get_logger("credential_review_node")
 
@@ -15,31 +16,20 @@ class CredentialReviewNode:
     def __init__(self, *args, **kwargs):
         pass
 
-    def __call__(self, state: AgentState) -> Dict[str, Any]:
+    def _prepare(self, state: AgentState) -> List:
         logger.info("Credential review node: Preparing credential summary for human approval")
 
-        email = state.get("user_email", "lakmal")
-        password = state.get("user_password", "12345")
-        conversation_history = state.get("messages", [])
-        user_message = state.get("user_query", "")
-
-        system_prompt = PROMPTS.get("credential_review").format(
-            email=email,
-            password=password,
-            user_query=user_message
+        return PROMPTS.messages(
+            "credential_review",
+            HISTORY.for_node(state, routes.HUMAN_REVIEW_NODE),
+            email=state.get("user_email", "lakmal"),
+            password=state.get("user_password", "12345"),
+            user_query=state.get("user_query", "")
         )
 
-        llm = get_llm(temperature=0, model=AiModel.GPT_5_NANO)
-
-        messages = [
-            SystemMessage(content=system_prompt),
-            *conversation_history
-        ]
-
-        response = llm.invoke(messages)
-
+    def _result(self, state: AgentState, summary: str) -> Dict[str, Any]:
         review_message = {
-            "summary": response.content,
+            "summary": summary,
             "status": "pending_credential_confirmation",
             "message": "Please confirm the email and password before continuing:",
             "requires_approval": True
@@ -48,8 +38,20 @@ class CredentialReviewNode:
         return {
             "pending_review": review_message,
             "awaiting_credential_approval": True,
-            "user_email": email,
-            "user_password": password,
+            "user_email": state.get("user_email", "lakmal"),
+            "user_password": state.get("user_password", "12345"),
             "credentials_reviewed": False,
             "current_node": "CredentialReviewNode"
-        }
\ No newline at end of file
+        }
+
+    def __call__(self, state: AgentState) -> Dict[str, Any]:
+        llm = get_llm(temperature=0, model=AiModel.GPT_5_NANO, cache="memory")
+        response = llm.invoke(self._prepare(state))
+        PROMPTS.record_usage("credential_review", response)
+        return self._result(state, response.content)
+
+    async def acall(self, state: AgentState) -> Dict[str, Any]:
+        llm = get_llm(temperature=0, model=AiModel.GPT_5_NANO, cache="memory")
+        response = await llm.ainvoke(self._prepare(state))
+        PROMPTS.record_usage("credential_review", response)
+        return self._result(state, response.content)
@@ -1,28 +1,57 @@
-from typing import Dict, Any
+import re
+from typing import Dict, Any, Optional
+
+from app.agents.coalescing import STAGE_FLIGHTS, sql_execution_key
+from app.agents.content_store import CONTENT_STORE
 from app.agents.state import AgentState
 from app.agents.tools.execute_dynamic_sql_query_tool import QueryExecutorTool
 from app.enums.intent import intents
 
+MEMBER_PLACEHOLDER = re.compile(r"(?<!:):member_id\b")
+
 
 class ExecuteSQLQueryNode:
     def __init__(self):
         pass
 
+    @staticmethod
+    def _missing_query(state: AgentState) -> Dict[str, Any]:
+        return {
+            "tool_results_ref": CONTENT_STORE.put("No SQL query provided"),
+            "current_node": "ExecuteSQLQueryNode",
+        }
+
+    @staticmethod
+    def _params(state: AgentState, sql_query: str) -> Optional[Dict[str, Any]]:
+        """Bind the verified member to member-scoped SQL; without one the query fails instead of going unscoped."""
+        if not MEMBER_PLACEHOLDER.search(sql_query):
+            return None
+        return {"member_id": state.get("member_id") if state.get("credentials_valid") else None}
+
+    @staticmethod
+    def _result(result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "tool_results_ref": CONTENT_STORE.put(str(result)),
+            "intent": intents.SQL_QUERY,
+            "current_node": "ExecuteSQLQueryNode"
+        }
+
     def __call__(self, state: AgentState) -> Dict[str, Any]:
         sql_query = state.get("sql_query", "")
-
         if not sql_query:
-            return {
-                "tool_results": "No SQL query provided",
-                "current_node": "ExecuteSQLQueryNode",
-                **state,
-            }
+            return self._missing_query(state)
 
         query_tool = QueryExecutorTool()
-        result = query_tool._run(sql_query)
+        return self._result(query_tool._run(sql_query, self._params(state, sql_query)))
 
-        return {
-            "tool_results": str(result),
-            "intent": intents.SQL_QUERY,
-            "current_node": "ExecuteSQLQueryNode"
-        }
\ No newline at end of file
+    async def acall(self, state: AgentState) -> Dict[str, Any]:
+        sql_query = state.get("sql_query", "")
+        if not sql_query:
+            return self._missing_query(state)
+
+        query_tool = QueryExecutorTool()
+        params = self._params(state, sql_query)
+        result = await STAGE_FLIGHTS.do(
+            sql_execution_key(state, sql_query, params), lambda: query_tool._arun(sql_query, params)
+        )
+        return self._result(result)
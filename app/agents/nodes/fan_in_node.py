@@ -0,0 +1,47 @@
+from typing import Dict, Any
+
+from app.agents.state import AgentState
+from app.core.logger import get_logger
+from app.enums.intent import intents
+
+logger = get_logger("fan_in_node")
+
+
+class FanInNode:
+    """
+    Joins the parallel start branches: intent router, schema search and credential lookup.
+
+    Each branch writes its own keys; this node reduces them to the routing
+    decision. Small talk and questions the schema cannot answer go to the
+    conversation node, member questions without verified credentials go to
+    credential review, and everything else straight to SQL generation.
+    """
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def _result(state: AgentState) -> Dict[str, Any]:
+        if state.get("intent") == intents.GENERAL:
+            logger.info("Small talk, skipping the database path")
+            return {"can_answer_from_db": False, "need_to_interrupt": False, "current_node": "FanInNode"}
+
+        if not state.get("can_answer_from_db"):
+            return {"need_to_interrupt": False, "current_node": "FanInNode"}
+
+        need_to_interrupt = bool(state.get("requires_member_scope")) and not state.get("credentials_valid")
+        logger.info(
+            f"Fan-in: member_scope={state.get('requires_member_scope')}, "
+            f"credentials_valid={state.get('credentials_valid')}, interrupt={need_to_interrupt}"
+        )
+        return {
+            "intent": intents.GENERAL,
+            "need_to_interrupt": need_to_interrupt,
+            "current_node": "FanInNode"
+        }
+
+    def __call__(self, state: AgentState) -> Dict[str, Any]:
+        return self._result(state)
+
+    async def acall(self, state: AgentState) -> Dict[str, Any]:
+        return self._result(state)
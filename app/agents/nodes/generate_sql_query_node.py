@@ -1,29 +1,33 @@
 import json
 from typing import Dict, Any
 
+from app.agents.cache.sql_cache import SQL_CACHE
+from app.agents.coalescing import STAGE_FLIGHTS, sql_generation_key
+from app.agents.content_store import CONTENT_STORE
+from app.agents.history_manager import HISTORY
 from app.agents.state import AgentState
 from app.agents.tools.sql_generator_tool import SQLGeneratorTool
+from app.core.config import settings
 from app.core.logger import logger
 from app.enums.intent import intents
+from app.enums.routes import routes
 
 
 class GenerateSQLQueryNode:
     def __init__(self):
         pass
 
-    def __call__(self, state: AgentState) -> Dict[str, Any]:
+    @staticmethod
+    def _tool_input(state: AgentState) -> Dict[str, Any]:
         logger.info(f"[generate_sql_query_node] called")
-        sql_tool = SQLGeneratorTool()
-
-        user_query = state.get("user_query", "")
-        schema_info = state.get("schema_info", "")
-        messages = state.get("messages", [])
+        return {
+            "user_query": state.get("user_query", ""),
+            "schema_info": CONTENT_STORE.get(state.get("schema_info_ref"), ""),
+            "messages": HISTORY.for_node(state, routes.GENERATE_SQL_QUERY_NODE),
+        }
 
-        result = sql_tool._run(
-            user_query=user_query,
-            schema_info=schema_info,
-            messages=messages
-        )
+    @staticmethod
+    def _result(result) -> Dict[str, Any]:
         if isinstance(result, dict):
             result = json.dumps(result)
 
@@ -32,4 +36,47 @@ class GenerateSQLQueryNode:
             "intent": intents.SQL_QUERY,
             "need_to_interrupt": False,
             "current_node": "GenerateSQLQueryNode"
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def _cached(tool_input: Dict[str, Any]):
+        if not settings.SQL_CACHE_ENABLED:
+            return None
+        return SQL_CACHE.get(tool_input["user_query"], tool_input["schema_info"], tool_input["messages"])
+
+    @staticmethod
+    def _remember(tool_input: Dict[str, Any], sql_query):
+        if settings.SQL_CACHE_ENABLED and isinstance(sql_query, str):
+            SQL_CACHE.put(tool_input["user_query"], tool_input["schema_info"], tool_input["messages"], sql_query)
+
+    def generate(self, state: AgentState) -> str:
+        tool_input = self._tool_input(state)
+        cached = self._cached(tool_input)
+        if cached is not None:
+            return cached
+
+        result = SQLGeneratorTool()._run(**tool_input)
+        self._remember(tool_input, result)
+        return result
+
+    async def agenerate(self, state: AgentState) -> str:
+        # Pull the schema into memory off the event loop if this worker has not seen it yet.
+        await CONTENT_STORE.aget(state.get("schema_info_ref"))
+        tool_input = self._tool_input(state)
+        cached = self._cached(tool_input)
+        if cached is not None:
+            return cached
+
+        key = sql_generation_key(state, tool_input["schema_info"], tool_input["messages"])
+        if key is None:
+            result = await SQLGeneratorTool()._arun(**tool_input)
+        else:
+            result = await STAGE_FLIGHTS.do(key, lambda: SQLGeneratorTool()._arun(**tool_input))
+        self._remember(tool_input, result)
+        return result
+
+    def __call__(self, state: AgentState) -> Dict[str, Any]:
+        return self._result(self.generate(state))
+
+    async def acall(self, state: AgentState) -> Dict[str, Any]:
+        return self._result(await self.agenerate(state))
@@ -1,35 +1,39 @@
 from typing import Dict, Any
+from app.agents.coalescing import STAGE_FLIGHTS, schema_search_key
+from app.agents.content_store import CONTENT_STORE
 from app.agents.tools.schema_search_tool import AgenticSchemaSearchTool
 from app.core.logger import get_logger
 from app.agents.state import AgentState
-from app.enums.intent import intents
 
 logger = get_logger("get_table_info_node")
 
 
 class GetTableInfoNode:
     def __init__(self):
-        pass
-
-    def __call__(self, state: AgentState) -> Dict[str, Any]:
-        logger.info("get_table_info_node called")
-
-        user_query = state.get("user_query", "")
-        conversation_history = state.get("messages", [])
+        self.tool = AgenticSchemaSearchTool()
 
+    @staticmethod
+    def _tool_input(state: AgentState) -> Dict[str, Any]:
         user_email = state.get("user_email", "").strip()
-        user_password = state.get("user_password", "").strip()
         logger.info(f"Schema search complete: can_answer={user_email}")
-
-        tool = AgenticSchemaSearchTool()
-        schema_result = tool.run({
-            "query": user_query,
+        return {
+            "query": state.get("user_query", ""),
             "user_email": user_email,
-            "user_password": user_password,
-        })
+            "user_password": state.get("user_password", "").strip(),
+        }
+
+    def __call__(self, state: AgentState) -> Dict[str, Any]:
+        logger.info("get_table_info_node called")
+        return self._result(state, self.tool.run(self._tool_input(state)))
+
+    async def acall(self, state: AgentState) -> Dict[str, Any]:
+        logger.info("get_table_info_node called")
+        tool_input = self._tool_input(state)
+        schema_result = await STAGE_FLIGHTS.do(schema_search_key(state), lambda: self.tool.arun(tool_input))
+        return self._result(state, schema_result)
 
+    def _result(self, state: AgentState, schema_result: Dict[str, Any]) -> Dict[str, Any]:
         can_answer = schema_result.get("can_answer_query", False)
-        need_to_interrupt = schema_result.get("need_to_interrupt", False)
         logger.info(f"Schema search complete: can_answer={can_answer}")
         logger.info(
             f"Tables analyzed: {schema_result.get('tables_analyzed', 0)} out of {schema_result.get('total_tables_in_db', 0)}")
@@ -37,19 +41,15 @@ class GetTableInfoNode:
         if not can_answer:
             logger.info("Query cannot be answered from database schema")
             return {
-                "messages": conversation_history,
-                "schema_info": schema_result,
+                "schema_info_ref": CONTENT_STORE.put(schema_result),
                 "can_answer_from_db": False,
-                "need_to_interrupt": need_to_interrupt,
+                "requires_member_scope": False,
                 "current_node": "GetTableInfoNode",
-                **state,
             }
 
         return {
-            "messages": conversation_history,
-            "schema_info": schema_result,
-            "intent": intents.GENERAL,
+            "schema_info_ref": CONTENT_STORE.put(schema_result),
             "can_answer_from_db": True,
-            "need_to_interrupt": need_to_interrupt,
+            "requires_member_scope": schema_result.get("requires_member_scope", False),
             "current_node": "GetTableInfoNode"
         }
\ No newline at end of file
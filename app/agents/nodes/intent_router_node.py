@@ -0,0 +1,86 @@
+import asyncio
+import re
+from typing import Dict, Any, Optional
+
+from app.agents.embeddings.intent_index import INTENT_INDEX
+from app.agents.embeddings.service import EMBEDDINGS
+from app.agents.state import AgentState
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.enums.intent import intents
+
+logger = get_logger("intent_router_node")
+
+SMALL_TALK = re.compile(
+    r"^\s*(hi|hello|hey|hiya|howdy|yo|good\s+(morning|afternoon|evening|night)|"
+    r"thanks?(\s+you)?(\s+(so|very)\s+much)?|thx|ty|cheers|ok(ay)?|cool|great|nice|"
+    r"bye|goodbye|see\s+you|how\s+are\s+you)"
+    r"[\s!.,?]*(there|again|a\s+lot|for\s+(the|your)\s+help)?[\s!.,?]*$",
+    re.IGNORECASE
+)
+
+
+class IntentRouterNode:
+    """
+    Cheap pre-classification before schema search.
+
+    Greetings and thanks are matched by regex; everything else is classified
+    by kNN over labelled example embeddings (the query embedding is reused
+    by schema search through the embedding cache). Only confident small talk
+    skips the DB pipeline; anything uncertain goes to schema search as before.
+    """
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def _classify(query: str, query_vec) -> intents:
+        intent, confidence, similarity = INTENT_INDEX.ensure(EMBEDDINGS, EMBEDDINGS.model_name).classify(
+            query_vec, settings.INTENT_ROUTER_K
+        )
+        logger.info(f"Intent kNN for '{query}': {intent} (confidence={confidence:.2f}, similarity={similarity:.2f})")
+        if (intent == intents.GENERAL and confidence >= settings.INTENT_ROUTER_MIN_CONFIDENCE
+                and similarity >= settings.INTENT_ROUTER_MIN_SIMILARITY):
+            return intents.GENERAL
+        return intents.SQL_QUERY
+
+    @staticmethod
+    def _fast_path(query: str) -> Optional[intents]:
+        if not settings.INTENT_ROUTER_ENABLED:
+            return intents.SQL_QUERY
+        if SMALL_TALK.match(query):
+            return intents.GENERAL
+        return None
+
+    @staticmethod
+    def _result(intent: intents) -> Dict[str, Any]:
+        logger.info(f"Routing intent: {intent}")
+        return {
+            # Data questions get their intent from the SQL path; clear last turn's.
+            "intent": intents.GENERAL if intent == intents.GENERAL else None,
+            "current_node": "IntentRouterNode"
+        }
+
+    def __call__(self, state: AgentState) -> Dict[str, Any]:
+        query = state.get("user_query", "")
+        intent = self._fast_path(query)
+        if intent is None:
+            try:
+                intent = self._classify(query, EMBEDDINGS.embed_query(query))
+            except Exception as e:
+                logger.warning(f"Intent classification failed, using schema search: {e}")
+                intent = intents.SQL_QUERY
+        return self._result(intent)
+
+    async def acall(self, state: AgentState) -> Dict[str, Any]:
+        query = state.get("user_query", "")
+        intent = self._fast_path(query)
+        if intent is None:
+            try:
+                query_vec = await EMBEDDINGS.aembed_query(query)
+                # The first call embeds the labelled examples; keep that off the event loop.
+                intent = await asyncio.to_thread(self._classify, query, query_vec)
+            except Exception as e:
+                logger.warning(f"Intent classification failed, using schema search: {e}")
+                intent = intents.SQL_QUERY
+        return self._result(intent)
@@ -0,0 +1,35 @@
+from typing import Dict, Any
+
+from app.agents.nodes.generate_sql_query_node import GenerateSQLQueryNode
+from app.agents.speculation import SPECULATIVE_SQL, thread_id
+from app.agents.state import AgentState
+from app.core.logger import get_logger
+
+logger = get_logger("speculative_sql_node")
+
+
+class SpeculativeSQLNode(GenerateSQLQueryNode):
+    """
+    SQL generation after credential approval.
+
+    Reuses the SQL generated in the background while the thread waited for
+    review; generates it as usual when there is none for this question.
+    """
+
+    @staticmethod
+    def _thread(state: AgentState) -> str:
+        return thread_id(state.get("session_id", ""), state.get("conversation_id"))
+
+    def __call__(self, state: AgentState) -> Dict[str, Any]:
+        sql_query = SPECULATIVE_SQL.take_done(self._thread(state), state)
+        if sql_query is None:
+            return super().__call__(state)
+        logger.info("Reusing speculative SQL")
+        return self._result(sql_query)
+
+    async def acall(self, state: AgentState) -> Dict[str, Any]:
+        sql_query = await SPECULATIVE_SQL.take(self._thread(state), state)
+        if sql_query is None:
+            return await super().acall(state)
+        logger.info("Reusing speculative SQL")
+        return self._result(sql_query)
@@ -1,67 +1,83 @@
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 from app.agents.state import AgentState
 from app.agents.tools.execute_dynamic_sql_query_tool import QueryExecutorTool
 
 from app.core.logger import logger
-from app.enums.intent import intents
 
 
 class CheckUserCredentialsNode:
     def __init__(self):
         pass
 
-    def __call__(self, state: AgentState) -> Dict[str, Any]:
+    @staticmethod
+    def _credentials(state: AgentState) -> Tuple[str, str]:
         logger.info(f"[check_user_credentials_node] called")
+        return state.get("user_email", "").strip(), state.get("user_password", "").strip()
+
+    @staticmethod
+    def _missing_credentials(state: AgentState, user_email: str, user_password: str) -> Dict[str, Any]:
+        logger.info(f"[check_user_credentials_node] user_data: {user_email}, {user_password}")
+        return {
+            "user_credentials_checked": True,
+            "credentials_valid": False,
+            "member_id": None,
+            "error": "Missing email or password",
+            "user_data": {},
+            "current_node": "CheckUserCredentialsNode",
+        }
+
+    @staticmethod
+    def _lookup_query(user_email: str, user_password: str) -> str:
+        return f"SELECT id, name, email, membership_type FROM members WHERE email = '{user_email}' AND hashed_password = '{user_password}' AND is_active = true"
 
-        user_email = state.get("user_email", "").strip()
-        user_password = state.get("user_password", "").strip()
+    @staticmethod
+    def _result(state: AgentState, sql_query: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        credentials_valid = result.get("success", False) and result.get("row_count", 0) > 0
+        user_data = result.get("data", [{}])[0] if credentials_valid else {}
+        logger.info(f"[check_user_credentials_node] user_data: {user_data}")
+        return {
+            "user_credentials_checked": True,
+            "credentials_valid": credentials_valid,
+            "member_id": user_data.get("id"),
+            "user_data": user_data,
+            "query_result": result,
+            "current_node": "CheckUserCredentialsNode",
+        }
 
+    @staticmethod
+    def _error(error: Exception) -> Dict[str, Any]:
+        logger.error(f"[check_user_credentials_node] Error: {str(error)}")
+        return {
+            "user_credentials_checked": True,
+            "credentials_valid": False,
+            "member_id": None,
+            "error": f"Database error: {str(error)}",
+            "user_data": {},
+            "current_node": "CheckUserCredentialsNode"
+        }
+
+    def __call__(self, state: AgentState) -> Dict[str, Any]:
+        user_email, user_password = self._credentials(state)
         if not user_email or not user_password:
-            logger.info(f"[check_user_credentials_node] user_data: {user_email}, {user_password}")
-            return {
-                "sql_query": "",
-                "intent": intents.CREDENTIALS_CHECK,
-                "need_to_interrupt": True,
-                "user_credentials_checked": True,
-                "credentials_valid": False,
-                "error": "Missing email or password",
-                "user_data": {},
-                "current_node": "CheckUserCredentialsNode",
-                **state,
-            }
+            return self._missing_credentials(state, user_email, user_password)
 
         try:
-            sql_query = f"SELECT id, name, email, membership_type FROM members WHERE email = '{user_email}' AND hashed_password = '{user_password}' AND is_active = true"
-
-            query_tool = QueryExecutorTool()
-            result = query_tool._run(sql_query)
+            sql_query = self._lookup_query(user_email, user_password)
+            result = QueryExecutorTool()._run(sql_query)
+            return self._result(state, sql_query, result)
+        except Exception as e:
+            return self._error(e)
 
-            credentials_valid = result.get("success", False) and result.get("row_count", 0) > 0
-            user_data = result.get("data", [{}])[0] if credentials_valid else {}
-            logger.info(f"[check_user_credentials_node] user_data: {user_data}")
-            return {
-                "sql_query": sql_query,
-                "intent": intents.CREDENTIALS_CHECK,
-                "need_to_interrupt": not credentials_valid,
-                "user_credentials_checked": True,
-                "credentials_valid": credentials_valid,
-                "user_data": user_data,
-                "query_result": result,
-                "current_node": "CheckUserCredentialsNode",
-                **state,
-            }
+    async def acall(self, state: AgentState) -> Dict[str, Any]:
+        user_email, user_password = self._credentials(state)
+        if not user_email or not user_password:
+            return self._missing_credentials(state, user_email, user_password)
 
+        try:
+            sql_query = self._lookup_query(user_email, user_password)
+            result = await QueryExecutorTool()._arun(sql_query)
+            return self._result(state, sql_query, result)
         except Exception as e:
-            logger.error(f"[check_user_credentials_node] Error: {str(e)}")
-            return {
-                "sql_query": "",
-                "intent": intents.CREDENTIALS_CHECK,
-                "need_to_interrupt": True,
-                "user_credentials_checked": True,
-                "credentials_valid": False,
-                "error": f"Database error: {str(e)}",
-                "user_data": {},
-                "current_node": "CheckUserCredentialsNode"
-            }
\ No newline at end of file
+            return self._error(e)
@@ -1,8 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Tuple
 
 class PromptProvider(ABC):
 
     @abstractmethod
     def get_prompt(self, name: str, **kwargs: Any) -> str:
         pass
+
+    @abstractmethod
+    def get_parts(self, name: str, **kwargs: Any) -> Tuple[str, str]:
+        """Return the (static instructions, rendered dynamic tail) of a prompt."""
+        pass
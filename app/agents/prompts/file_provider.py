@@ -1,16 +1,81 @@
 import os
-from jinja2 import Environment, FileSystemLoader
+from typing import Dict, Set, Tuple
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template, meta
+
 from .base import PromptProvider
 
+DYNAMIC_MARKER = "{# --- dynamic --- #}"
+TEMPLATE_EXTENSIONS = (".txt", ".j2")
+
+
+class CompiledPrompt:
+    """
+    A template split at DYNAMIC_MARKER.
+
+    The static block may not reference variables and is rendered once, so it
+    is byte-identical on every call; the dynamic tail is compiled once and
+    rendered per call. A template without the marker and without variables
+    is all static.
+    """
+
+    def __init__(self, name: str, static: str, dynamic: Template, variables: Set[str]):
+        self.name = name
+        self.static = static
+        self.dynamic = dynamic
+        self.variables = variables
+
+    def render_parts(self, **kwargs) -> Tuple[str, str]:
+        return self.static, self.dynamic.render(**kwargs).strip()
+
+    def render(self, **kwargs) -> str:
+        return "\n\n".join(part for part in self.render_parts(**kwargs) if part)
+
+
 class FilePromptProvider(PromptProvider):
     def __init__(self, template_dir: str):
         self.template_dir = template_dir
-        self.env = Environment(loader=FileSystemLoader(template_dir))
+        self.env = Environment(loader=FileSystemLoader(template_dir), undefined=StrictUndefined)
+        self.prompts: Dict[str, CompiledPrompt] = self._compile_all()
+
+    def _compile_all(self) -> Dict[str, CompiledPrompt]:
+        filenames = os.listdir(self.template_dir)
+        prompts = {}
+        for ext in TEMPLATE_EXTENSIONS:
+            for filename in sorted(filenames):
+                name, file_ext = os.path.splitext(filename)
+                if file_ext == ext and name not in prompts:
+                    source, _, _ = self.env.loader.get_source(self.env, filename)
+                    prompts[name] = self._compile(name, source)
+        return prompts
+
+    def _compile(self, name: str, source: str) -> CompiledPrompt:
+        static, marker, dynamic = source.partition(DYNAMIC_MARKER)
+        if not marker:
+            static, dynamic = ("", source) if self._variables(source) else (source, "")
+
+        if self._variables(static):
+            raise ValueError(
+                f"Prompt '{name}' uses {sorted(self._variables(static))} before {DYNAMIC_MARKER}"
+            )
+        return CompiledPrompt(
+            name,
+            static=self.env.from_string(static).render().strip(),
+            dynamic=self.env.from_string(dynamic),
+            variables=self._variables(dynamic),
+        )
+
+    def _variables(self, source: str) -> Set[str]:
+        return meta.find_undeclared_variables(self.env.parse(source))
+
+    def _compiled(self, name: str) -> CompiledPrompt:
+        prompt = self.prompts.get(name)
+        if prompt is None:
+            raise FileNotFoundError(f"Prompt '{name}' not found in {self.template_dir}")
+        return prompt
 
     def get_prompt(self, name: str, **kwargs) -> str:
-        for ext in (".txt", ".j2"):
-            path = os.path.join(self.template_dir, name + ext)
-            if os.path.exists(path):
-                template = self.env.get_template(name + ext)
-                return template.render(**kwargs)
-        raise FileNotFoundError(f"Prompt '{name}' not found in {self.template_dir}")
+        return self._compiled(name).render(**kwargs)
+
+    def get_parts(self, name: str, **kwargs) -> Tuple[str, str]:
+        return self._compiled(name).render_parts(**kwargs)
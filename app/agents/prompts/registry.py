@@ -1,14 +1,74 @@
 import os
-from functools import lru_cache
+from typing import Any, Dict, List, Sequence
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from app.utils.tokens import count_tokens
 from .file_provider import FilePromptProvider
 
+
 class PromptRegistry:
+    """
+    Prompt templates, compiled once at startup and rendered in a single pass.
+
+    `messages` lays a prompt out as [static instructions, history, dynamic
+    tail], so the instructions are a byte-identical prefix on every call and
+    provider-side prompt caching can reuse them across turns and users.
+    `record_usage` reads the cached prompt tokens the provider reports back,
+    giving a prefix-cache hit rate per template.
+    """
+
     def __init__(self, base_dir: str):
         self.provider = FilePromptProvider(os.path.join(base_dir, "templates"))
+        self._prefix_tokens = {
+            name: count_tokens(prompt.static) for name, prompt in self.provider.prompts.items()
+        }
+        self._usage: Dict[str, Dict[str, int]] = {}
 
-    @lru_cache(maxsize=None)
     def get(self, name: str, **kwargs) -> str:
         return self.provider.get_prompt(name, **kwargs)
 
+    def messages(self, name: str, history: Sequence[BaseMessage] = (), **kwargs) -> List[BaseMessage]:
+        static, dynamic = self.provider.get_parts(name, **kwargs)
+        self._counter(name)["renders"] += 1
+        if not static:
+            return [SystemMessage(content=dynamic), *history]
+        if not dynamic:
+            return [SystemMessage(content=static), *history]
+        return [SystemMessage(content=static), *history, HumanMessage(content=dynamic)]
+
+    def record_usage(self, name: str, response) -> None:
+        usage = getattr(response, "usage_metadata", None) or {}
+        if not usage.get("input_tokens"):
+            return
+        cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+        counter = self._counter(name)
+        counter["llm_calls"] += 1
+        counter["prompt_tokens"] += usage["input_tokens"]
+        counter["cached_tokens"] += cached
+        counter["cache_hits"] += 1 if cached else 0
+
+    def _counter(self, name: str) -> Dict[str, int]:
+        counter = self._usage.get(name)
+        if counter is None:
+            counter = self._usage[name] = {
+                "renders": 0, "llm_calls": 0, "cache_hits": 0, "prompt_tokens": 0, "cached_tokens": 0
+            }
+        return counter
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {}
+        for name, counter in self._usage.items():
+            calls = counter["llm_calls"]
+            stats[name] = {
+                **counter,
+                "static_prefix_tokens": self._prefix_tokens.get(name, 0),
+                "prefix_hit_rate": round(counter["cache_hits"] / calls, 4) if calls else 0.0,
+                "cached_token_ratio": (
+                    round(counter["cached_tokens"] / counter["prompt_tokens"], 4) if calls else 0.0
+                ),
+            }
+        return stats
+
 
 PROMPTS = PromptRegistry(os.path.dirname(__file__))
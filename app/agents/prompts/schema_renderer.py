@@ -0,0 +1,121 @@
+import json
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.utils.tokens import count_tokens
+
+logger = get_logger("schema_renderer")
+
+SENSITIVE_COLUMN_MARKERS = ("password", "secret", "token")
+
+
+class SchemaRenderer:
+    """
+    Renders a schema search result as compact DDL for the SQL prompt.
+
+    Indexes and defaults are dropped, long sample values are truncated and
+    sensitive columns are masked. If the result is still over the token
+    budget, detail is removed step by step: extra sample rows, then all
+    samples, then comments, then the least relevant tables.
+    """
+
+    def __init__(self, token_budget: int, max_value_chars: int = 40):
+        self.token_budget = token_budget
+        self.max_value_chars = max_value_chars
+
+    def render(self, schema_info: Any, samples: bool = True) -> str:
+        """Render within the token budget; `samples=False` leaves out sample rows (and the data in them)."""
+        if not isinstance(schema_info, dict):
+            return str(schema_info or "")
+
+        tables = schema_info.get("schema") or []
+        joins = schema_info.get("join_paths") or []
+
+        rendered = ""
+        for sample_rows, comments in ((2, True), (1, True), (0, True), (0, False)):
+            if sample_rows and not samples:
+                continue
+            rendered = self._render(tables, joins, sample_rows, comments)
+            tokens = count_tokens(rendered)
+            if tokens <= self.token_budget:
+                logger.info(f"Rendered schema: {len(tables)} tables, {tokens} tokens")
+                return rendered
+
+        kept = list(tables)
+        while len(kept) > 1:
+            kept.pop()
+            rendered = self._render(kept, joins, 0, False)
+            if count_tokens(rendered) <= self.token_budget:
+                break
+
+        logger.warning(
+            f"Schema over budget ({self.token_budget} tokens): kept {len(kept)} of {len(tables)} tables"
+        )
+        return rendered
+
+    def _render(self, tables: List[Dict[str, Any]], joins: List[str], sample_rows: int, comments: bool) -> str:
+        names = {table["table"] for table in tables}
+        blocks = [self._render_table(table, sample_rows, comments) for table in tables]
+
+        usable_joins = [join for join in joins if self._join_tables(join) <= names]
+        if usable_joins:
+            blocks.append("-- Join paths:\n" + "\n".join(f"--   {join}" for join in usable_joins))
+
+        return "\n\n".join(blocks)
+
+    @staticmethod
+    def _join_tables(join: str) -> set:
+        return {side.strip().split(".")[0] for clause in join.split(" AND ") for side in clause.split("=")}
+
+    def _render_table(self, table: Dict[str, Any], sample_rows: int, comments: bool) -> str:
+        primary_key = set(table.get("primary_key") or [])
+        references = {
+            col: f"{fk['referred_table']}({ref_col})"
+            for fk in table.get("foreign_keys") or []
+            for col, ref_col in zip(fk["constrained_columns"], fk["referred_columns"])
+        }
+
+        lines = []
+        for col in table["columns"]:
+            line = f"  {col['name']} {col['type']}"
+            if col["name"] in primary_key:
+                line += " PRIMARY KEY"
+            elif not col.get("nullable", True):
+                line += " NOT NULL"
+            if col["name"] in references:
+                line += f" REFERENCES {references[col['name']]}"
+            if comments and col.get("comment"):
+                line += f" -- {col['comment']}"
+            lines.append(line)
+
+        header = f"CREATE TABLE {table['table']} ("
+        if comments and table.get("comment"):
+            header += f" -- {table['comment']}"
+        block = header + "\n" + ",\n".join(lines) + "\n);"
+
+        samples = (table.get("sample_data") or [])[:sample_rows]
+        if samples:
+            block += "\n" + "\n".join(f"-- sample: {self._render_row(row)}" for row in samples)
+
+        return block
+
+    def _render_row(self, row: Dict[str, Any]) -> str:
+        return json.dumps(
+            {column: self._render_value(column, value) for column, value in row.items()},
+            default=str,
+            ensure_ascii=False
+        )
+
+    def _render_value(self, column: str, value: Any) -> Any:
+        if any(marker in column.lower() for marker in SENSITIVE_COLUMN_MARKERS):
+            return "***"
+        if isinstance(value, str) and len(value) > self.max_value_chars:
+            return value[:self.max_value_chars] + "..."
+        return value
+
+
+SCHEMA_RENDERER = SchemaRenderer(
+    token_budget=settings.SQL_SCHEMA_TOKEN_BUDGET,
+    max_value_chars=settings.SQL_SCHEMA_SAMPLE_VALUE_CHARS
+)
@@ -0,0 +1,124 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.agents.state import AgentState
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger("speculation")
+
+
+def thread_id(session_id: str, conversation_id) -> str:
+    return f"{session_id}_conv_{conversation_id}"
+
+
+def speculation_key(state: AgentState) -> Tuple[str, Optional[str]]:
+    """The question and the schema it was generated against; anything else means a different query."""
+    return state.get("user_query", ""), state.get("schema_info_ref")
+
+
+class SpeculativeSQL:
+    """
+    SQL generated for a thread while it waits for credential review.
+
+    When a turn interrupts for review, the SQL for the pending question is
+    generated in the background and kept per thread. After approval the
+    speculative SQL node takes it instead of calling the LLM, so approval
+    only has to verify the member and execute. Member-scoped queries use a
+    `:member_id` placeholder, which keeps the SQL independent of who is
+    approved. Entries are local to this worker; a thread resumed elsewhere
+    falls back to generating the SQL.
+    """
+
+    def __init__(self, max_pending: int, ttl: float):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._pending: "OrderedDict[str, Tuple[Tuple, float, asyncio.Task]]" = OrderedDict()
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+    def start(self, thread: str, state: AgentState, generate: Callable[[], Awaitable[str]]):
+        if not settings.SPECULATIVE_SQL_ENABLED:
+            return
+        self.discard(thread)
+        self._expire()
+        while len(self._pending) >= self.max_pending:
+            self.discard(next(iter(self._pending)))
+
+        task = asyncio.ensure_future(generate())
+        task.add_done_callback(self._log_failure)
+        self._pending[thread] = (speculation_key(state), time.monotonic(), task)
+        self.started += 1
+        logger.info(f"Speculative SQL started for {thread}")
+
+    async def take(self, thread: str, state: AgentState) -> Optional[str]:
+        """The SQL generated for this thread's pending question, or None if there is none to reuse."""
+        entry = self._pending.pop(thread, None)
+        if entry is None or entry[0] != speculation_key(state) or time.monotonic() - entry[1] > self.ttl:
+            if entry is not None:
+                entry[2].cancel()
+            self.misses += 1
+            return None
+
+        try:
+            sql_query = await entry[2]
+        except Exception:
+            sql_query = None
+
+        if not sql_query:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return sql_query
+
+    def take_done(self, thread: str, state: AgentState) -> Optional[str]:
+        """Sync variant of `take`: only a finished generation can be reused."""
+        entry = self._pending.pop(thread, None)
+        if entry is None or not entry[2].done():
+            if entry is not None:
+                entry[2].cancel()
+            self.misses += 1
+            return None
+        task = entry[2]
+        if entry[0] != speculation_key(state) or task.cancelled() or task.exception() is not None or not task.result():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return task.result()
+
+    def discard(self, thread: str):
+        entry = self._pending.pop(thread, None)
+        if entry is not None:
+            entry[2].cancel()
+            self.discarded += 1
+
+    def _expire(self):
+        now = time.monotonic()
+        for thread in [t for t, (_, started, _) in self._pending.items() if now - started > self.ttl]:
+            self.discard(thread)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Speculative SQL generation failed: {task.exception()}")
+
+    def stats(self) -> Dict[str, Any]:
+        taken = self.hits + self.misses
+        return {
+            "pending": len(self._pending),
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "discarded": self.discarded,
+            "hit_rate": self.hits / taken if taken else 0.0,
+        }
+
+
+SPECULATIVE_SQL = SpeculativeSQL(
+    max_pending=settings.SPECULATIVE_SQL_MAX_PENDING,
+    ttl=settings.SPECULATIVE_SQL_TTL_SECONDS,
+)
@@ -15,18 +15,20 @@ class AgentState(TypedDict):
     intent: intents
 
     response: str
-    tool_results: str
+    tool_results_ref: Optional[str]
     sql_query:str
 
     generated_sql_query: Optional[str]
     pending_review: Optional[Dict[str, Any]]
     rejection_reason: Optional[str]
     can_answer_from_db:bool
-    schema_info: str
+    requires_member_scope: bool
+    schema_info_ref: Optional[str]
     need_to_interrupt: bool
     credentials_approved: bool
     credentials_reviewed: bool
     user_email:str
     user_password: str
     user_credentials_checked:bool
-    credentials_valid:bool
\ No newline at end of file
+    credentials_valid:bool
+    member_id: Optional[int]
\ No newline at end of file
@@ -1,11 +1,13 @@
+import asyncio
+
 from langchain_core.tools import BaseTool
 from sqlalchemy.orm import Session as DBSession
 from sqlalchemy import text
-from typing import Dict, Any, Coroutine
+from typing import Dict, Any, Coroutine, Optional
 import json
 
 from app.core.logger import get_logger
-from app.db.dbconnection import get_db
+from app.db.dbconnection import SessionLocal
 
 _db_session: DBSession = None
 
@@ -18,12 +20,13 @@ class QueryExecutorTool(BaseTool):
     name: str = "query_executor"
     description: str = "Executes SQL queries and returns results in JSON format"
 
-    def _run(self, sql_query: str, **kwargs) -> Dict[str, Any]:
+    def _run(self, sql_query: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
         """
         Run a SQL query and return the results in a simple format.
 
         Args:
             sql_query: The SQL query string to execute
+            params: Values for named placeholders such as `:member_id`
 
         Returns:
             JSON string containing query results or error information
@@ -31,22 +34,9 @@ class QueryExecutorTool(BaseTool):
         logger.info(f"[QueryExecutorTool] called")
         try:
             if _db_session:
-                db_session = _db_session
-            else:
-                db_session = next(get_db())
-
-            result = db_session.execute(text(sql_query))
-            rows = result.fetchall()
-            columns = result.keys()
-
-            data = [dict(zip(columns, row)) for row in rows]
-            logger.info(f"[QueryExecutorTool] {data}")
-            return {
-                "success": True,
-                "row_count": len(data),
-                "data": data,
-                "query": sql_query
-            }
+                return self._execute(_db_session, sql_query, params)
+            with SessionLocal() as db_session:
+                return self._execute(db_session, sql_query, params)
 
         except Exception as e:
             return  {
@@ -54,3 +44,22 @@ class QueryExecutorTool(BaseTool):
                 "error": str(e),
                 "query": sql_query
             }
+
+    async def _arun(self, sql_query: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        """Run the query on a worker thread so the event loop keeps serving other requests."""
+        return await asyncio.to_thread(self._run, sql_query, params)
+
+    @staticmethod
+    def _execute(db_session: DBSession, sql_query: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        result = db_session.execute(text(sql_query), params or {})
+        rows = result.fetchall()
+        columns = result.keys()
+
+        data = [dict(zip(columns, row)) for row in rows]
+        logger.info(f"[QueryExecutorTool] {data}")
+        return {
+            "success": True,
+            "row_count": len(data),
+            "data": data,
+            "query": sql_query
+        }
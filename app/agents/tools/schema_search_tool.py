@@ -1,12 +1,14 @@
+import asyncio
+
 from langchain_core.tools import BaseTool
-from sqlalchemy import inspect, text
-from typing import Any, Dict, List, Optional
-from pydantic import Field
-import numpy as np
+from typing import Any, Dict, List, Tuple
 
-from app.db.dbconnection import get_db
+from app.agents.embeddings.schema_index import COLUMN_INDEX, TABLE_INDEX
+from app.agents.embeddings.service import EMBEDDINGS
+from app.core.config import settings
+from app.db.sample_rows import SAMPLE_ROWS
+from app.db.schema_catalog import SCHEMA_CATALOG, SchemaSnapshot
 from app.core.logger import get_logger
-from langchain_community.embeddings import OllamaEmbeddings
 
 logger = get_logger("agentic_schema_search")
 
@@ -14,151 +16,177 @@ logger = get_logger("agentic_schema_search")
 class AgenticSchemaSearchTool(BaseTool):
     name: str = "agentic_schema_search"
     description: str = (
-        "Searches the database schema using fast local embeddings via Ollama. "
+        "Searches the database schema using fast local embeddings (Ollama or in-process). "
         "Does NOT send table names or schema to LLM — completely local, fast and scalable."
     )
 
-    table_cache: Optional[List[Dict[str, str]]] = Field(default=None, exclude=True)
-    table_embeddings: Optional[Dict[str, np.ndarray]] = Field(default=None, exclude=True)
-
-
-    def _get_embedder(self):
-        return OllamaEmbeddings(model="nomic-embed-text")
-
-    def _get_table_metadata(self, inspector) -> List[Dict[str, str]]:
-        if self.table_cache is not None:
-            return self.table_cache
-
-        tables = inspector.get_table_names()
-        metadata = []
-
-        for table in tables:
-            try:
-                comment = inspector.get_table_comment(table).get("text", "")
-                metadata.append({
-                    "table_name": table,
-                    "comment": comment or ""
-                })
-            except:
-                metadata.append({
-                    "table_name": table,
-                    "comment": ""
-                })
-
-        self.table_cache = metadata
-        logger.info(f"Loaded {len(metadata)} tables from DB")
-        return metadata
-
-    def _build_table_embeddings(self, table_metadata):
-        if self.table_embeddings is not None:
-            return self.table_embeddings
-
-        embedder = self._get_embedder()
-        self.table_embeddings = {}
-
-        table_names = [t["table_name"] for t in table_metadata]
-
-        logger.info("Building table embeddings using Ollama...")
-
-        vectors = embedder.embed_documents(table_names)
-
-        for name, vec in zip(table_names, vectors):
-            self.table_embeddings[name] = np.array(vec, dtype=np.float32)
-
-        logger.info(f"Table embeddings created: {len(self.table_embeddings)} tables embedded.")
-        return self.table_embeddings
-
-    def _semantic_table_selection(self, query: str, table_metadata) -> List[str]:
-        embedder = self._get_embedder()
-
-        query_vec = np.array(embedder.embed_query(query), dtype=np.float32)
-
-        table_embeddings = self._build_table_embeddings(table_metadata)
-
-        scores = []
-        for table_name, vec in table_embeddings.items():
-            sim = np.dot(query_vec, vec) / (np.linalg.norm(query_vec) * np.linalg.norm(vec))
-            scores.append((table_name, float(sim)))
-
-        scores.sort(key=lambda x: x[1], reverse=True)
-
-        top_tables = [name for name, score in scores[:8]]
-
-        logger.info(f"Top embedding matches for query '{query}': {top_tables}")
-        return top_tables
-
-
-    def _get_detailed_schema(self, inspector, table_names: List[str]) -> List[Dict[str, Any]]:
+    def _semantic_table_selection(
+            self,
+            query: str,
+            query_vec: List[float],
+            snapshot: SchemaSnapshot
+    ) -> Tuple[List[str], Dict[str, float]]:
+        table_index = TABLE_INDEX.ensure(snapshot, EMBEDDINGS, EMBEDDINGS.model_name)
+        column_index = COLUMN_INDEX.ensure(snapshot, EMBEDDINGS, EMBEDDINGS.model_name)
+
+        table_names, table_sims = table_index.score_all(query_vec)
+        table_scores = dict(zip(table_names, table_sims.tolist()))
+
+        column_names, column_sims = column_index.score_all(query_vec)
+        column_scores = dict(zip(column_names, column_sims.tolist()))
+
+        for column, score in column_scores.items():
+            table = column.split(".", 1)[0]
+            if score > table_scores.get(table, -1.0):
+                table_scores[table] = score
+
+        ranked = sorted(table_scores.items(), key=lambda x: x[1], reverse=True)[:settings.SCHEMA_TOP_K_MAX]
+        top_tables = self._adaptive_cutoff(ranked)
+
+        logger.info(f"Top embedding matches for query '{query}': {ranked[:len(top_tables)]}")
+        return top_tables, column_scores
+
+    @staticmethod
+    def _adaptive_cutoff(ranked: List[Tuple[str, float]]) -> List[str]:
+        """Keep tables close to the best match, then cut at a pronounced elbow."""
+        if not ranked:
+            return []
+
+        floor = max(settings.SCHEMA_MIN_SCORE, ranked[0][1] - settings.SCHEMA_SCORE_MARGIN)
+        kept = [ranked[0]] + [item for item in ranked[1:] if item[1] >= floor]
+
+        if len(kept) > settings.SCHEMA_TOP_K_MIN:
+            gaps = [kept[i][1] - kept[i + 1][1] for i in range(len(kept) - 1)]
+            elbow = max(range(len(gaps)), key=gaps.__getitem__)
+            if gaps[elbow] >= settings.SCHEMA_ELBOW_MIN_GAP:
+                kept = kept[:elbow + 1]
+
+        if len(kept) < settings.SCHEMA_TOP_K_MIN:
+            kept = ranked[:settings.SCHEMA_TOP_K_MIN]
+
+        return [name for name, _ in kept]
+
+    @staticmethod
+    def _relevant_columns(
+            table_schema: Dict[str, Any],
+            column_scores: Dict[str, float],
+            is_bridge: bool
+    ) -> List[Dict[str, Any]]:
+        columns = table_schema["columns"]
+        keys = set(table_schema["primary_key"]) | {
+            col for fk in table_schema["foreign_keys"] for col in fk["constrained_columns"]
+        }
+
+        if is_bridge:
+            return [col for col in columns if col["name"] in keys]
+        if len(columns) <= settings.SCHEMA_PRUNE_MIN_COLUMNS:
+            return columns
+
+        table = table_schema["table"]
+        ranked = sorted(
+            (col for col in columns if col["name"] not in keys),
+            key=lambda col: column_scores.get(f"{table}.{col['name']}", 0.0),
+            reverse=True
+        )
+        relevant = {
+            col["name"] for col in ranked
+            if column_scores.get(f"{table}.{col['name']}", 0.0) >= settings.SCHEMA_COLUMN_MIN_SCORE
+        }
+        relevant.update(col["name"] for col in ranked[:settings.SCHEMA_MIN_COLUMNS_PER_TABLE])
+
+        return [col for col in columns if col["name"] in keys or col["name"] in relevant]
+
+    def _get_detailed_schema(
+            self,
+            snapshot: SchemaSnapshot,
+            table_names: List[str],
+            selected_tables: List[str],
+            column_scores: Dict[str, float]
+    ) -> List[Dict[str, Any]]:
         detailed_schema = []
+        sample_rows = SAMPLE_ROWS.get_many(table_names)
 
         for table in table_names:
-            try:
-                columns = inspector.get_columns(table)
-                foreign_keys = inspector.get_foreign_keys(table)
-                indexes = inspector.get_indexes(table)
-
-                db = next(get_db())
-                sample_query = text(f"SELECT * FROM {table} LIMIT 3")
-                sample_data = db.execute(sample_query).fetchall()
-
-                detailed_schema.append({
-                    "table": table,
-                    "columns": [
-                        {
-                            "name": col["name"],
-                            "type": str(col["type"]),
-                            "nullable": col.get("nullable", True),
-                            "default": col.get("default")
-                        }
-                        for col in columns
-                    ],
-                    "foreign_keys": foreign_keys,
-                    "indexes": indexes,
-                    "sample_rows": len(sample_data),
-                    "sample_data": [dict(row._mapping) for row in sample_data[:2]]
-                })
-            except Exception as e:
-                logger.error(f"Error fetching schema for {table}: {e}")
+            table_schema = snapshot.get_table(table)
+            if table_schema is None:
+                logger.error(f"Table {table} is not in schema catalog v{snapshot.version}")
                 continue
 
-        return detailed_schema
+            columns = self._relevant_columns(table_schema, column_scores, is_bridge=table not in selected_tables)
+            kept = {col["name"] for col in columns}
+            sample_data = [
+                {column: value for column, value in row.items() if column in kept}
+                for row in sample_rows.get(table, [])
+            ]
+
+            detailed_schema.append({
+                "table": table,
+                "comment": table_schema["comment"],
+                "columns": columns,
+                "primary_key": table_schema["primary_key"],
+                "foreign_keys": [
+                    fk for fk in table_schema["foreign_keys"]
+                    if set(fk["constrained_columns"]) <= kept
+                ],
+                "has_member_id": table_schema["has_member_id"],
+                "sample_rows": len(sample_data),
+                "sample_data": sample_data[:2]
+            })
 
-    def _run(self, query: str, user_email: str = "", user_password: str = "", **kwargs) -> Dict[str, Any]:
-        db = next(get_db())
-        inspector = inspect(db.bind)
+        return detailed_schema
 
+    def _search(self, query: str, query_vec: List[float], user_email: str, user_password: str) -> Dict[str, Any]:
         try:
-            logger.info("STAGE 1 - Loading table metadata...")
-            table_metadata = self._get_table_metadata(inspector)
+            logger.info("STAGE 1 - Loading table metadata from schema catalog...")
+            snapshot = SCHEMA_CATALOG.get()
 
             logger.info("STAGE 2 - Embedding semantic search (no LLM)...")
-            relevant_tables = self._semantic_table_selection(query, table_metadata)
+            selected_tables, column_scores = self._semantic_table_selection(query, query_vec, snapshot)
 
+            relevant_tables, join_paths = snapshot.join_graph.expand(selected_tables)
             logger.info(f"Selected {len(relevant_tables)} relevant tables: {relevant_tables}")
 
             logger.info("STAGE 3 - Fetching detailed schema for selected tables...")
-            detailed_schema = self._get_detailed_schema(inspector, relevant_tables)
+            detailed_schema = self._get_detailed_schema(snapshot, relevant_tables, selected_tables, column_scores)
 
-            need_interrupt = False
-            if not user_email or not user_password:
-                need_interrupt = any(
-                    any(col["name"].lower() == "member_id" for col in table["columns"])
-                    for table in detailed_schema
-                )
+            requires_member_scope = any(snapshot.has_member_id(table) for table in relevant_tables)
+            need_interrupt = requires_member_scope and (not user_email or not user_password)
 
             return {
                 "success": True,
-                "total_tables_in_db": len(table_metadata),
+                "schema_version": snapshot.version,
+                "total_tables_in_db": len(snapshot.tables),
                 "tables_analyzed": len(relevant_tables),
                 "schema": detailed_schema,
+                "join_paths": join_paths,
                 "can_answer_query": True,
                 "need_to_interrupt": need_interrupt,
+                "requires_member_scope": requires_member_scope,
             }
 
         except Exception as e:
-            logger.error(f"Agentic schema search failed: {e}")
-            return {
-                "success": False,
-                "error": str(e),
-                "can_answer_query": False,
-            }
+            return self._failure(e)
+
+    @staticmethod
+    def _failure(error: Exception) -> Dict[str, Any]:
+        logger.error(f"Agentic schema search failed: {error}")
+        return {
+            "success": False,
+            "error": str(error),
+            "can_answer_query": False,
+        }
+
+    def _run(self, query: str, user_email: str = "", user_password: str = "", **kwargs) -> Dict[str, Any]:
+        try:
+            query_vec = EMBEDDINGS.embed_query(query)
+        except Exception as e:
+            return self._failure(e)
+        return self._search(query, query_vec, user_email, user_password)
+
+    async def _arun(self, query: str, user_email: str = "", user_password: str = "", **kwargs) -> Dict[str, Any]:
+        try:
+            query_vec = await EMBEDDINGS.aembed_query(query)
+        except Exception as e:
+            return self._failure(e)
+        # Catalog checks, index scoring and sample-row reads are blocking DB/numpy work.
+        return await asyncio.to_thread(self._search, query, query_vec, user_email, user_password)
@@ -1,42 +1,51 @@
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
-from langchain_core.messages import SystemMessage
 from langchain_core.tools import BaseTool
 
 from app.agents.llm_provider import get_llm
 from app.agents.prompts.registry import PROMPTS
+from app.agents.prompts.schema_renderer import SCHEMA_RENDERER
 from app.core.logger import logger
 from app.enums import AiModel
+from app.utils.tokens import count_tokens
 
 
 class SQLGeneratorTool(BaseTool):
     name: str = "sql_generator"
     description: str = "Generates SQL queries based on natural language questions and database schema"
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self._llm = None
-
     @property
     def llm(self):
-        if self._llm is None:
-            self._llm = get_llm(temperature=0, model=AiModel.GPT_5_NANO)
-        return self._llm
+        # Prompts with history or sample rows may carry member data; keep them off disk.
+        return get_llm(temperature=0, model=AiModel.GPT_5_NANO, cache="memory")
+
+    @property
+    def persistent_llm(self):
+        return get_llm(temperature=0, model=AiModel.GPT_5_NANO, cache=True)
 
-    def _run(self, user_query: str, schema_info: str, messages: List = None, **kwargs) -> str:
+    def _prepare(self, user_query: str, schema_info: Dict[str, Any], messages: List = None) -> Tuple[Any, List]:
+        """
+        Build the prompt and pick the cache tier for it.
+
+        A first-turn question is rendered without sample rows, so its prompt
+        holds only the schema and the question and may be memoized on disk;
+        with history the full prompt stays in the memory-only cache.
+        """
         logger.info(f"[sql_generator_tool] called")
 
         conversation_history = messages or []
-        user_message = user_query
-        db_schema = str(schema_info)
+        persistent = not conversation_history
+        db_schema = SCHEMA_RENDERER.render(schema_info, samples=not persistent)
         logger.info(f"[sql_generator_tool] result: {db_schema}")
 
-        system_prompt = PROMPTS.get("sql_generator").format( query=user_message, db_schema=db_schema)
-        logger.info(f"[SQLGeneratorTool system_prompt] : {system_prompt}")
-        messages = [SystemMessage(content=system_prompt), *conversation_history]
+        prompt = PROMPTS.messages("sql_generator", conversation_history, query=user_query, db_schema=db_schema)
+        logger.info(f"[SQLGeneratorTool prompt] ({count_tokens(prompt[-1].content)} dynamic tokens): {prompt[-1].content}")
+        return (self.persistent_llm if persistent else self.llm), prompt
 
-        response = self.llm.invoke(messages)
+    @staticmethod
+    def _parse(response) -> str:
+        PROMPTS.record_usage("sql_generator", response)
         logger.info(f"[SQLGeneratorTool] result: {response}")
         try:
             sql_query = response.content.strip().replace('```sql', '').replace('```', '').strip()
@@ -47,5 +56,12 @@ class SQLGeneratorTool(BaseTool):
         logger.info(f"sql_query: {sql_query}")
         return sql_query
 
-    async def _arun(self, user_query: str, schema_info: str, messages: List = None, **kwargs) -> Dict[str, Any]:
-        return self._run(user_query, schema_info, messages, **kwargs)
\ No newline at end of file
+    def _run(self, user_query: str, schema_info: Dict[str, Any], messages: List = None, **kwargs) -> str:
+        llm, prompt = self._prepare(user_query, schema_info, messages)
+        response = llm.invoke(prompt)
+        return self._parse(response)
+
+    async def _arun(self, user_query: str, schema_info: Dict[str, Any], messages: List = None, **kwargs) -> str:
+        llm, prompt = self._prepare(user_query, schema_info, messages)
+        response = await llm.ainvoke(prompt)
+        return self._parse(response)
@@ -23,6 +23,105 @@ class Settings(BaseSettings):
     OPENAI_AI_MODEL:str
     API_BASE_URL: str = "http://localhost:8000"
 
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 60
+    LLM_HTTP_TIMEOUT_SECONDS: float = 120
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5
+    LLM_MAX_CONCURRENCY_OPENAI: int = 16
+    LLM_MAX_CONCURRENCY_OLLAMA: int = 2
+    LLM_QUEUE_MAX: int = 200
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 30
+    LLM_RATE_LIMIT_RETRIES: int = 3
+    LLM_RATE_LIMIT_BACKOFF_SECONDS: float = 1
+    LLM_RATE_LIMIT_MAX_BACKOFF_SECONDS: float = 30
+    LLM_TIMEOUT_SECONDS: float = 30
+    LLM_TIMEOUT_CONVERSATION_SECONDS: float = 30
+    LLM_TIMEOUT_SQL_GENERATOR_SECONDS: float = 20
+    LLM_TIMEOUT_CREDENTIAL_REVIEW_SECONDS: float = 15
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 1.0
+    LLM_FALLBACK_ENABLED: bool = True
+    LLM_BREAKER_WINDOW: int = 20
+    LLM_BREAKER_MIN_CALLS: int = 5
+    LLM_BREAKER_FAILURE_RATE: float = 0.5
+    LLM_BREAKER_SLOW_CALL_SECONDS: float = 20
+    LLM_BREAKER_OPEN_SECONDS: float = 30
+
+    SCHEMA_FINGERPRINT_CHECK_SECONDS: int = 30
+    SCHEMA_WATCH_INTERVAL_SECONDS: int = 60
+    JOIN_GRAPH_MAX_BRIDGE_HOPS: int = 3
+    SCHEMA_TOP_K_MIN: int = 1
+    SCHEMA_TOP_K_MAX: int = 8
+    SCHEMA_MIN_SCORE: float = 0.3
+    SCHEMA_SCORE_MARGIN: float = 0.12
+    SCHEMA_ELBOW_MIN_GAP: float = 0.05
+    SCHEMA_COLUMN_MIN_SCORE: float = 0.4
+    SCHEMA_MIN_COLUMNS_PER_TABLE: int = 3
+    SCHEMA_PRUNE_MIN_COLUMNS: int = 6
+    SQL_SCHEMA_TOKEN_BUDGET: int = 1500
+    SQL_SCHEMA_SAMPLE_VALUE_CHARS: int = 40
+    SAMPLE_ROWS_TTL_SECONDS: int = 300
+    SAMPLE_ROWS_MAX_STALE_SECONDS: int = 3600
+    SAMPLE_ROWS_MAX_WORKERS: int = 4
+
+    EMBEDDING_BACKEND: str = "ollama"
+    EMBEDDING_MODEL: str = "nomic-embed-text"
+    LOCAL_EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    LOCAL_EMBEDDING_DEVICE: str = "cpu"
+    LOCAL_EMBEDDING_WORKERS: int = 2
+    EMBEDDING_WARM_UP: bool = True
+    EMBEDDING_CACHE_DIR: str = str(PROJECT_ROOT / ".cache" / "embeddings")
+    EMBEDDING_CACHE_SIZE: int = 4096
+    EMBEDDING_CACHE_TTL_SECONDS: int = 3600
+    EMBEDDING_BATCH_WINDOW_MS: float = 3
+    EMBEDDING_MAX_BATCH: int = 64
+
+    INTENT_ROUTER_ENABLED: bool = True
+    INTENT_ROUTER_K: int = 5
+    INTENT_ROUTER_MIN_SIMILARITY: float = 0.6
+    INTENT_ROUTER_MIN_CONFIDENCE: float = 0.75
+
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIZE: int = 1024
+    ANSWER_CACHE_TTL_SECONDS: int = 6 * 3600
+    ANSWER_CACHE_MIN_SIMILARITY: float = 0.92
+
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = str(PROJECT_ROOT / ".cache" / "llm_cache.sqlite3")
+    LLM_CACHE_MEMORY_SIZE: int = 512
+    LLM_CACHE_MAX_MB: int = 256
+
+    SQL_CACHE_ENABLED: bool = True
+    SQL_CACHE_SIZE: int = 2048
+    SQL_CACHE_TTL_SECONDS: int = 24 * 3600
+    SQL_CACHE_MASK_ENTITIES: bool = True
+
+    HISTORY_TOKENS_CONVERSATION: int = 2000
+    HISTORY_TOKENS_CREDENTIAL_REVIEW: int = 600
+    HISTORY_TOKENS_SQL_GENERATOR: int = 800
+    HISTORY_TURNS_SQL_GENERATOR: int = 2
+    HISTORY_SUMMARY_MIN_MESSAGES: int = 4
+    HISTORY_SUMMARY_CACHE_SIZE: int = 2048
+    HISTORY_SUMMARY_TTL_SECONDS: int = 24 * 3600
+
+    CHECKPOINT_DATABASE_URL: str = f"sqlite:///{PROJECT_ROOT / '.cache' / 'checkpoints.sqlite3'}"
+    CHECKPOINT_KEEP_LATEST: int = 3
+    CHECKPOINT_FLUSH_INTERVAL_SECONDS: float = 0.05
+    CHECKPOINT_FLUSH_BATCH_SIZE: int = 100
+    CHECKPOINT_HOT_THREADS: int = 256
+    CHECKPOINT_EVICT_INTERVAL_SECONDS: int = 600
+    CHECKPOINT_MAX_PENDING_ROWS: int = 20000
+    CHECKPOINT_FLUSH_MAX_BACKOFF_SECONDS: float = 30
+    CONTENT_STORE_MEMORY_SIZE: int = 512
+    CONTENT_STORE_MEMORY_TTL_SECONDS: int = 3600
+    CONTENT_STORE_TTL_SECONDS: int = 48 * 3600
+
+    SPECULATIVE_SQL_ENABLED: bool = True
+    SPECULATIVE_SQL_MAX_PENDING: int = 256
+    SPECULATIVE_SQL_TTL_SECONDS: int = 15 * 60
+
 
     class Config:
         env_file = ENV_FILE
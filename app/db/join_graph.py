@@ -0,0 +1,107 @@
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.logger import get_logger
+
+logger = get_logger("join_graph")
+
+
+class JoinGraph:
+    """
+    Undirected graph of tables connected by reflected foreign keys.
+
+    A BFS from every table precomputes shortest join paths between all
+    pairs, so expanding a table selection with bridge tables is a lookup.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, Any]], max_bridge_hops: int = 3):
+        self.max_bridge_hops = max_bridge_hops
+        self.conditions: Dict[Tuple[str, str], str] = {}
+        self.adjacency: Dict[str, List[str]] = {name: [] for name in tables}
+
+        for table_name, table in tables.items():
+            for fk in table["foreign_keys"]:
+                referred = fk.get("referred_table")
+                if referred not in self.adjacency or referred == table_name:
+                    continue
+                condition = " AND ".join(
+                    f"{table_name}.{col} = {referred}.{ref_col}"
+                    for col, ref_col in zip(fk["constrained_columns"], fk["referred_columns"])
+                )
+                self._add_edge(table_name, referred, condition)
+
+        self._parents = {source: self._bfs(source) for source in self.adjacency}
+
+    def _add_edge(self, left: str, right: str, condition: str):
+        if (left, right) in self.conditions:
+            return
+        self.conditions[(left, right)] = condition
+        self.conditions[(right, left)] = condition
+        self.adjacency[left].append(right)
+        self.adjacency[right].append(left)
+
+    def _bfs(self, source: str) -> Dict[str, Optional[str]]:
+        parents: Dict[str, Optional[str]] = {source: None}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for neighbour in self.adjacency[node]:
+                if neighbour not in parents:
+                    parents[neighbour] = node
+                    queue.append(neighbour)
+        return parents
+
+    def path(self, source: str, target: str) -> Optional[List[str]]:
+        parents = self._parents.get(source)
+        if parents is None or target not in parents:
+            return None
+
+        path = [target]
+        while path[-1] != source:
+            path.append(parents[path[-1]])
+        path.reverse()
+        return path
+
+    def expand(self, selected: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Connect the selected tables with the fewest bridge tables.
+
+        Tables are attached in relevance order, each through the shortest
+        path to any table already in the tree. Returns the expanded table
+        list (selected first, then bridges) and the join conditions used.
+        """
+        if not selected:
+            return [], []
+
+        tree = [selected[0]]
+        in_tree = {selected[0]}
+        bridges: List[str] = []
+        joins: List[str] = []
+
+        for table in selected[1:]:
+            if table in in_tree:
+                continue
+
+            best = None
+            for member in tree:
+                candidate = self.path(member, table)
+                if candidate and (best is None or len(candidate) < len(best)):
+                    best = candidate
+
+            if best is None or len(best) - 2 > self.max_bridge_hops:
+                tree.append(table)
+                in_tree.add(table)
+                continue
+
+            for left, right in zip(best, best[1:]):
+                joins.append(self.conditions[(left, right)])
+                if right not in in_tree:
+                    tree.append(right)
+                    in_tree.add(right)
+                    if right not in selected:
+                        bridges.append(right)
+
+        if bridges:
+            logger.info(f"Added bridge tables {bridges} to connect {selected}")
+
+        return [t for t in selected if t in in_tree] + bridges, list(dict.fromkeys(joins))
@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db.dbconnection import engine
+from app.db.schema_catalog import SCHEMA_CATALOG, SchemaSnapshot
+
+logger = get_logger("sample_rows")
+
+
+class SampleRowCache:
+    """
+    TTL snapshot cache of a few sample rows per table.
+
+    Fresh entries are served from memory. Entries older than `ttl` but younger
+    than `max_stale` are still served while a background refresh runs.
+    Missing tables are fetched concurrently over the connection pool, each on
+    its own pooled connection that is returned when the query finishes.
+    """
+
+    def __init__(self, db_engine: Engine, ttl: float, max_stale: float, row_limit: int, workers: int):
+        self._engine = db_engine
+        self._ttl = ttl
+        self._max_stale = max_stale
+        self._row_limit = row_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sample-rows")
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[List[Dict[str, Any]], float]] = {}
+        self._refreshing: set = set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def on_schema_change(self, snapshot: SchemaSnapshot):
+        if snapshot.changed_tables is None:
+            self.clear()
+            return
+        with self._lock:
+            for table in snapshot.changed_tables:
+                self._entries.pop(table, None)
+
+    def get_many(self, table_names: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        now = time.monotonic()
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        missing: List[str] = []
+        stale: List[str] = []
+
+        with self._lock:
+            for table in table_names:
+                entry = self._entries.get(table)
+                if entry is None or now - entry[1] > self._max_stale:
+                    missing.append(table)
+                    continue
+                result[table] = entry[0]
+                if now - entry[1] > self._ttl and table not in self._refreshing:
+                    self._refreshing.add(table)
+                    stale.append(table)
+
+        for table in stale:
+            self._executor.submit(self._refresh, table)
+
+        if missing:
+            for table, rows in zip(missing, self._executor.map(self._fetch_safely, missing)):
+                if rows is not None:
+                    result[table] = rows
+
+        return result
+
+    def _refresh(self, table: str):
+        try:
+            self._fetch_safely(table)
+        finally:
+            with self._lock:
+                self._refreshing.discard(table)
+
+    def _fetch_safely(self, table: str):
+        try:
+            rows = self._fetch(table)
+        except Exception as e:
+            logger.error(f"Error fetching sample rows for {table}: {e}")
+            return None
+
+        with self._lock:
+            self._entries[table] = (rows, time.monotonic())
+        return rows
+
+    def _fetch(self, table: str) -> List[Dict[str, Any]]:
+        quoted = self._engine.dialect.identifier_preparer.quote(table)
+        with self._engine.connect() as conn:
+            rows = conn.execute(text(f"SELECT * FROM {quoted} LIMIT {self._row_limit}")).fetchall()
+        return [dict(row._mapping) for row in rows]
+
+
+SAMPLE_ROWS = SampleRowCache(
+    engine,
+    ttl=settings.SAMPLE_ROWS_TTL_SECONDS,
+    max_stale=settings.SAMPLE_ROWS_MAX_STALE_SECONDS,
+    row_limit=3,
+    workers=settings.SAMPLE_ROWS_MAX_WORKERS,
+)
+SCHEMA_CATALOG.add_listener(SAMPLE_ROWS.on_schema_change)
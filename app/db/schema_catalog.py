@@ -0,0 +1,295 @@
+import hashlib
+import threading
+import time
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db.dbconnection import engine
+from app.db.join_graph import JoinGraph
+
+logger = get_logger("schema_catalog")
+
+PRIVACY_COLUMN = "member_id"
+
+_MYSQL_SIGNATURE_SQL = (
+    "SELECT c.table_name, c.column_name, c.column_type, c.is_nullable, c.column_key, "
+    "c.column_comment, t.create_time, t.table_comment "
+    "FROM information_schema.columns c "
+    "JOIN information_schema.tables t "
+    "ON t.table_schema = c.table_schema AND t.table_name = c.table_name "
+    "WHERE c.table_schema = DATABASE() "
+    "ORDER BY c.table_name, c.ordinal_position"
+)
+
+_SIGNATURE_SQL = {
+    "mysql": _MYSQL_SIGNATURE_SQL,
+    "mariadb": _MYSQL_SIGNATURE_SQL,
+    "postgresql": (
+        "SELECT table_name, column_name, data_type, is_nullable, column_default "
+        "FROM information_schema.columns WHERE table_schema = current_schema() "
+        "ORDER BY table_name, ordinal_position"
+    ),
+}
+
+
+class SchemaSnapshot:
+    """
+    Immutable view of the reflected schema at one fingerprint.
+
+    `changed_tables` lists the tables re-reflected relative to the previous
+    snapshot (including removed ones); None means a full reflection.
+    """
+
+    def __init__(
+            self,
+            version: int,
+            fingerprint: str,
+            tables: Dict[str, Dict[str, Any]],
+            table_signatures: Dict[str, str],
+            changed_tables: Optional[Set[str]] = None
+    ):
+        self.version = version
+        self.fingerprint = fingerprint
+        self.tables = tables
+        self.table_signatures = table_signatures
+        self.changed_tables = changed_tables
+        self.created_at = time.time()
+
+    @property
+    def table_names(self) -> List[str]:
+        return list(self.tables.keys())
+
+    def get_table(self, table_name: str) -> Optional[Dict[str, Any]]:
+        return self.tables.get(table_name)
+
+    def has_member_id(self, table_name: str) -> bool:
+        table = self.tables.get(table_name)
+        return bool(table and table["has_member_id"])
+
+    @cached_property
+    def join_graph(self) -> JoinGraph:
+        return JoinGraph(self.tables, max_bridge_hops=settings.JOIN_GRAPH_MAX_BRIDGE_HOPS)
+
+
+class SchemaCatalog:
+    """
+    Process-wide cache of the reflected database schema.
+
+    Tables, columns, foreign keys, indexes and comments are reflected once and
+    served from memory. Per-table signatures are read from information_schema
+    at most every SCHEMA_FINGERPRINT_CHECK_SECONDS (or on refresh()); only
+    tables whose signature changed are re-reflected, and the new snapshot is
+    swapped in atomically.
+    """
+
+    def __init__(self, db_engine: Engine, check_interval: float):
+        self._engine = db_engine
+        self._check_interval = check_interval
+        self._lock = threading.RLock()
+        self._snapshot: Optional[SchemaSnapshot] = None
+        self._last_check = 0.0
+        self._stale = False
+        self._listeners: List[Callable[[SchemaSnapshot], None]] = []
+
+    def get(self) -> SchemaSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.refresh(force=False)
+        if time.monotonic() - self._last_check < self._check_interval:
+            return snapshot
+
+        # Another thread is already refreshing: keep serving the current snapshot.
+        if not self._lock.acquire(blocking=False):
+            return snapshot
+        try:
+            return self.refresh(force=False)
+        finally:
+            self._lock.release()
+
+    def refresh(self, force: bool = True) -> SchemaSnapshot:
+        """Compare table signatures and publish a new snapshot if anything changed."""
+        with self._lock:
+            if (not force and self._snapshot is not None
+                    and time.monotonic() - self._last_check < self._check_interval):
+                return self._snapshot
+
+            signatures = self._table_signatures()
+            fingerprint = self._fingerprint(signatures)
+            self._last_check = time.monotonic()
+
+            if self._snapshot is None or self._stale:
+                self._stale = False
+                return self._swap(self._reflect(fingerprint, signatures))
+
+            if self._snapshot.fingerprint == fingerprint:
+                return self._snapshot
+
+            return self._swap(self._reflect_changes(fingerprint, signatures))
+
+    def invalidate(self):
+        """Force a full re-reflection on the next access."""
+        with self._lock:
+            self._last_check = 0.0
+            self._stale = True
+
+    def add_listener(self, listener: Callable[[SchemaSnapshot], None]):
+        """Register a callback invoked with every newly published snapshot."""
+        self._listeners.append(listener)
+
+    def _swap(self, snapshot: SchemaSnapshot) -> SchemaSnapshot:
+        join_graph = snapshot.join_graph
+        self._snapshot = snapshot
+        logger.info(
+            f"Schema catalog v{snapshot.version} published: "
+            f"{len(snapshot.tables)} tables, {len(join_graph.conditions) // 2} joins, "
+            f"fingerprint={snapshot.fingerprint[:12]}"
+        )
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Schema catalog listener failed: {e}")
+        return snapshot
+
+    def _next_version(self) -> int:
+        return self._snapshot.version + 1 if self._snapshot is not None else 1
+
+    def _table_signatures(self) -> Dict[str, str]:
+        query = _SIGNATURE_SQL.get(self._engine.dialect.name)
+        if query is None:
+            return self._fallback_signatures()
+
+        try:
+            with self._engine.connect() as conn:
+                rows = conn.execute(text(query)).fetchall()
+        except Exception as e:
+            logger.warning(f"information_schema fingerprint failed, using table names: {e}")
+            return self._fallback_signatures()
+
+        digests: Dict[str, Any] = {}
+        for row in rows:
+            table_name = row[0]
+            digest = digests.setdefault(table_name, hashlib.sha1())
+            digest.update("|".join("" if value is None else str(value) for value in row[1:]).encode())
+            digest.update(b"\n")
+
+        return {table_name: digest.hexdigest() for table_name, digest in digests.items()}
+
+    def _fallback_signatures(self) -> Dict[str, str]:
+        return {table_name: "" for table_name in inspect(self._engine).get_table_names()}
+
+    @staticmethod
+    def _fingerprint(signatures: Dict[str, str]) -> str:
+        digest = hashlib.sha256()
+        for table_name in sorted(signatures):
+            digest.update(f"{table_name}:{signatures[table_name]}\n".encode())
+        return digest.hexdigest()
+
+    def _reflect(self, fingerprint: str, signatures: Dict[str, str]) -> SchemaSnapshot:
+        started = time.perf_counter()
+        inspector = inspect(self._engine)
+        tables = self._reflect_tables(inspector, inspector.get_table_names())
+
+        logger.info(f"Reflected {len(tables)} tables in {time.perf_counter() - started:.2f}s")
+        return SchemaSnapshot(
+            version=self._next_version(),
+            fingerprint=fingerprint,
+            tables=tables,
+            table_signatures=signatures,
+        )
+
+    def _reflect_changes(self, fingerprint: str, signatures: Dict[str, str]) -> SchemaSnapshot:
+        started = time.perf_counter()
+        previous = self._snapshot
+        changed = [
+            table_name for table_name, signature in signatures.items()
+            if previous.table_signatures.get(table_name) != signature
+        ]
+        removed = set(previous.tables) - set(signatures)
+
+        tables = {name: table for name, table in previous.tables.items() if name not in removed}
+        if changed:
+            tables.update(self._reflect_tables(inspect(self._engine), changed))
+
+        logger.info(
+            f"Re-reflected {len(changed)} changed tables {changed}, removed {sorted(removed)} "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return SchemaSnapshot(
+            version=self._next_version(),
+            fingerprint=fingerprint,
+            tables=tables,
+            table_signatures=signatures,
+            changed_tables=set(changed) | removed,
+        )
+
+    def _reflect_tables(self, inspector, table_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        columns = self._reflect_multi(inspector, "get_multi_columns", "get_columns", table_names)
+        foreign_keys = self._reflect_multi(inspector, "get_multi_foreign_keys", "get_foreign_keys", table_names)
+        indexes = self._reflect_multi(inspector, "get_multi_indexes", "get_indexes", table_names)
+        primary_keys = self._reflect_multi(inspector, "get_multi_pk_constraint", "get_pk_constraint", table_names)
+        comments = self._reflect_multi(inspector, "get_multi_table_comment", "get_table_comment", table_names)
+
+        return {
+            table_name: self._build_table(
+                table_name,
+                columns.get(table_name) or [],
+                foreign_keys.get(table_name) or [],
+                indexes.get(table_name) or [],
+                primary_keys.get(table_name) or {},
+                comments.get(table_name) or {},
+            )
+            for table_name in table_names
+        }
+
+    @staticmethod
+    def _reflect_multi(inspector, multi_method: str, single_method: str, table_names: List[str]) -> Dict[str, Any]:
+        try:
+            reflected = getattr(inspector, multi_method)(filter_names=table_names)
+            return {key[1]: value for key, value in reflected.items()}
+        except Exception as e:
+            logger.debug(f"{multi_method} unavailable, reflecting per table: {e}")
+
+        reflected = {}
+        for table_name in table_names:
+            try:
+                reflected[table_name] = getattr(inspector, single_method)(table_name)
+            except Exception as e:
+                logger.error(f"{single_method} failed for {table_name}: {e}")
+        return reflected
+
+    @staticmethod
+    def _build_table(
+            table_name: str,
+            columns: List[Dict[str, Any]],
+            foreign_keys: List[Dict[str, Any]],
+            indexes: List[Dict[str, Any]],
+            primary_key: Dict[str, Any],
+            comment: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return {
+            "table": table_name,
+            "comment": comment.get("text") or "",
+            "columns": [
+                {
+                    "name": col["name"],
+                    "type": str(col["type"]),
+                    "nullable": col.get("nullable", True),
+                    "default": col.get("default"),
+                    "comment": col.get("comment") or "",
+                }
+                for col in columns
+            ],
+            "primary_key": primary_key.get("constrained_columns") or [],
+            "foreign_keys": foreign_keys,
+            "indexes": indexes,
+            "has_member_id": any(col["name"].lower() == PRIVACY_COLUMN for col in columns),
+        }
+
+
+SCHEMA_CATALOG = SchemaCatalog(engine, settings.SCHEMA_FINGERPRINT_CHECK_SECONDS)
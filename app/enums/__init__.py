@@ -1,7 +1,9 @@
 from app.enums.ai_model import AiModel
+from app.enums.embedding_backend import EmbeddingBackend
+from app.enums.llm_priority import LLMPriority
 from app.enums.role import RoleType
 
 
-__all__ = ["RoleType", "AiModel"]
+__all__ = ["RoleType", "AiModel", "EmbeddingBackend", "LLMPriority"]
 
 
@@ -0,0 +1,5 @@
+from enum import Enum
+
+class EmbeddingBackend(str, Enum):
+    OLLAMA = "ollama"
+    LOCAL = "local"
@@ -0,0 +1,6 @@
+from enum import IntEnum
+
+class LLMPriority(IntEnum):
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
@@ -8,4 +8,8 @@ class routes(str, Enum):
     GENERATE_SQL_QUERY_NODE = "generate_sql_query_node"
     EXECUTE_SQL_QUERY_NODE = "execute_sql_query_node"
     CHECK_USER_CREDENTIALS_NODE = "check_user_credentials_node"
+    LOOKUP_CREDENTIALS_NODE = "lookup_credentials_node"
+    FAN_IN_NODE = "fan_in_node"
+    SPECULATIVE_SQL_NODE = "speculative_sql_node"
+    CREDENTIAL_GATE_NODE = "credential_gate_node"
 
@@ -1,13 +1,50 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.agents.cache.llm_cache import LLM_CALL_CACHE, LLM_MEMORY_CACHE
+from app.agents.cache.semantic_cache import ANSWER_CACHE
+from app.agents.cache.sql_cache import SQL_CACHE
+from app.agents.checkpointer import CHECKPOINTER
+from app.agents.coalescing import STAGE_FLIGHTS
+from app.agents.content_store import CONTENT_STORE
+from app.agents.embeddings.intent_index import INTENT_INDEX
+from app.agents.embeddings.service import EMBEDDINGS
+from app.agents.llm_provider import LLM_CLIENTS
+from app.agents.llm_resilience import resilience_stats
+from app.agents.llm_scheduler import LLM_SCHEDULER
+from app.agents.prompts.registry import PROMPTS
+from app.agents.speculation import SPECULATIVE_SQL
 from app.routers.chat import router as chat_router
 from app.routers.session import router as session_router
 from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.schema_watcher import SCHEMA_WATCHER
+
+logger = get_logger("main")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.EMBEDDING_WARM_UP:
+        try:
+            await asyncio.to_thread(EMBEDDINGS.warm_up)
+            await asyncio.to_thread(INTENT_INDEX.ensure, EMBEDDINGS, EMBEDDINGS.model_name)
+        except Exception as e:
+            logger.warning(f"Embedding warm-up failed: {e}")
+    SCHEMA_WATCHER.start()
+    yield
+    SCHEMA_WATCHER.stop()
+    await asyncio.to_thread(CHECKPOINTER.close)
+    await LLM_CLIENTS.aclose()
+
 
 app = FastAPI(
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -40,4 +77,20 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "llm_scheduler": LLM_SCHEDULER.stats(),
+        "llm_resilience": resilience_stats(),
+        "llm_cache": {"persistent": LLM_CALL_CACHE.stats(), "memory": LLM_MEMORY_CACHE.stats()},
+        "answer_cache": ANSWER_CACHE.stats(),
+        "sql_cache": SQL_CACHE.cache.stats(),
+        "embedding_cache": EMBEDDINGS.cache.stats(),
+        "coalescing": STAGE_FLIGHTS.stats(),
+        "prompts": PROMPTS.stats(),
+        "checkpointer": CHECKPOINTER.stats(),
+        "content_store": CONTENT_STORE.stats(),
+        "speculative_sql": SPECULATIVE_SQL.stats(),
+    }
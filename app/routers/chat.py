@@ -1,8 +1,10 @@
 import logging
 from typing import Dict, Any, List
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
 
+from app.agents.llm_scheduler import LLMOverloadedError
 from app.schemas.chat import ChatMessageResponse, ChatMessageRequest, ConversationResponse, \
     ConversationListResponse, MessageHistory, ChatHistoryResponse, CredentialApprovalRequest
 from app.services.chat_service import ChatService, get_chat_service
@@ -18,6 +20,7 @@ class ChatController:
 
     def _register_routes(self):
         self.router.post("/message", response_model=ChatMessageResponse)(self.send_message)
+        self.router.post("/message/stream")(self.stream_message)
         self.router.get("/conversations/{session_id}", response_model=ConversationListResponse)(self.get_user_conversations)
         self.router.get("/conversations/new/{session_id}", response_model=ConversationListResponse)(self.add_new_conversation)
         self.router.get("/history/{conversation_id}", response_model=ChatHistoryResponse)(self.get_chat_history)
@@ -44,6 +47,14 @@ class ChatController:
                 detail=error_msg
             )
 
+        except LLMOverloadedError as e:
+            logger.warning(f"Message rejected by LLM admission control: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The assistant is busy right now, please try again in a moment.",
+                headers={"Retry-After": "5"}
+            )
+
         except Exception as e:
             error_msg = f"Failed to process message: {str(e)}"
             logger.error(error_msg)
@@ -52,6 +63,26 @@ class ChatController:
                 detail=error_msg
             )
 
+    async def stream_message(
+            self, request: ChatMessageRequest, chat_service: ChatService = Depends(get_chat_service)
+    ) -> StreamingResponse:
+        try:
+            events = chat_service.stream_chat_message(request)
+
+        except Exception as e:
+            error_msg = f"Failed to process message: {str(e)}"
+            logger.error(error_msg)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=error_msg
+            )
+
+        return StreamingResponse(
+            events,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
     async def approve_credentials(
             self,
             request: CredentialApprovalRequest,
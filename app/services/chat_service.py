@@ -1,11 +1,17 @@
-from typing import Dict, Any
+import json
+import time
+from typing import Dict, Any, AsyncIterator, Tuple
 
 from fastapi import Depends
 
 from app.agents.graph import build_graph
+from app.agents.llm_scheduler import LLMOverloadedError, llm_priority
+from app.agents.nodes.generate_sql_query_node import GenerateSQLQueryNode
+from app.agents.speculation import SPECULATIVE_SQL, thread_id
 from app.db.dbconnection import get_db
-from app.enums import RoleType
+from app.enums import RoleType, LLMPriority
 from app.enums.intent import intents
+from app.enums.routes import routes
 from app.models import ChatMessage, Conversation
 from app.models.session import Session
 from app.repositories.chat_repository import ChatRepository
@@ -15,6 +21,22 @@ from app.core.logger import get_logger
 
 logger = get_logger("chat_service")
 
+NODE_PROGRESS = {
+    routes.INTENT_ROUTER_NODE: "Understanding the question",
+    routes.GET_TABLE_INFO_NODE: "Searching the library catalog",
+    routes.LOOKUP_CREDENTIALS_NODE: "Verifying member credentials",
+    routes.HUMAN_REVIEW_NODE: "Preparing credential review",
+    routes.CHECK_USER_CREDENTIALS_NODE: "Verifying member credentials",
+    routes.GENERATE_SQL_QUERY_NODE: "Writing the database query",
+    routes.SPECULATIVE_SQL_NODE: "Writing the database query",
+    routes.EXECUTE_SQL_QUERY_NODE: "Running the query",
+    routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE: "Composing the answer",
+}
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 
 class ChatService:
 
@@ -23,8 +45,9 @@ class ChatService:
         self.chat_repo = ChatRepository(db)
         self.conversation_repo = ConversationRepository(db)
         self.agent = build_graph()
+        self.sql_generator = GenerateSQLQueryNode()
 
-    async def process_chat_message(self, request) -> ChatMessageResponse:
+    def _start_turn(self, request) -> Tuple[Conversation, Dict[str, Any], Dict[str, Any]]:
         try:
             conversation = (self.conversation_repo
                             .get_or_create_conversation(request.session_id, request.conversation_id))
@@ -41,7 +64,7 @@ class ChatService:
 
         thread_config = {
             "configurable": {
-                "thread_id": f"{request.session_id}_conv_{conversation.id}"
+                "thread_id": thread_id(request.session_id, conversation.id)
             }
         }
 
@@ -51,11 +74,25 @@ class ChatService:
             "conversation_id": conversation.id,
         }
 
+        return conversation, thread_config, agent_state
+
+    def _speculate(self, thread_config: Dict[str, Any], values: Dict[str, Any]):
+        """Start generating the pending question's SQL while the thread waits for credential review."""
+        if values.get("credentials_reviewed", True) or not values.get("can_answer_from_db"):
+            return
+        SPECULATIVE_SQL.start(
+            thread_config["configurable"]["thread_id"], values, lambda: self.sql_generator.agenerate(values)
+        )
+
+    async def process_chat_message(self, request) -> ChatMessageResponse:
+        conversation, thread_config, agent_state = self._start_turn(request)
+
         result = await self.agent.ainvoke(agent_state, config=thread_config)
 
 
         if result.get("need_to_interrupt", False):
             logger.info("credentials human approval")
+            self._speculate(thread_config, result)
 
             pending_review = result.get("pending_review", {})
             logger.info(f"awaiting_credential_approval:{pending_review}", )
@@ -98,6 +135,108 @@ class ChatService:
             approved=True
         )
 
+    def stream_chat_message(self, request) -> AsyncIterator[str]:
+        """
+        Start the turn for one user message and return its Server-Sent Events.
+
+        The turn (conversation lookup, user message) is set up before the
+        stream is returned, so a failure there surfaces as a normal HTTP error
+        instead of a stream cut off after the 200 headers.
+        """
+        conversation, thread_config, agent_state = self._start_turn(request)
+        return self._stream_turn(request, conversation, thread_config, agent_state)
+
+    async def _stream_turn(
+            self,
+            request,
+            conversation: Conversation,
+            thread_config: Dict[str, Any],
+            agent_state: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """
+        Run the graph for the turn and yield Server-Sent Events.
+
+        Emits `progress` when a node starts, `token` for every chunk of the final
+        conversational answer, and a closing `review` (credential approval needed),
+        `done` or `error` event. The assistant message is persisted once the run ends.
+        """
+        yield sse_event("start", {"conversation_id": conversation.id, "session_id": request.session_id})
+
+        started = time.perf_counter()
+        first_token_ms = None
+        streamed = []
+        announced = set()
+
+        try:
+            async for event in self.agent.astream_events(agent_state, config=thread_config, version="v2"):
+                kind = event["event"]
+                node = event.get("metadata", {}).get("langgraph_node")
+
+                if kind == "on_chain_start" and event["name"] == node and node in NODE_PROGRESS:
+                    step = (event["metadata"].get("langgraph_step"), node)
+                    if step not in announced:
+                        announced.add(step)
+                        yield sse_event("progress", {"node": node, "message": NODE_PROGRESS[node]})
+
+                elif kind == "on_chat_model_stream" and node == routes.GENERATE_CONVERSATIONAL_RESPONSE_NODE:
+                    content = event["data"]["chunk"].content
+                    if not content:
+                        continue
+                    if first_token_ms is None:
+                        first_token_ms = round((time.perf_counter() - started) * 1000)
+                        logger.info(f"Time to first token: {first_token_ms}ms")
+                    streamed.append(content)
+                    yield sse_event("token", {"content": content})
+
+            result = (await self.agent.aget_state(thread_config)).values
+
+            if result.get("need_to_interrupt", False):
+                self._speculate(thread_config, result)
+                pending_review = result.get("pending_review", {})
+                response_text = pending_review.get("summary") or pending_review.get(
+                    "message") or "Please review the SQL query."
+                self.save_message(
+                    conversation_id=conversation.id,
+                    role=RoleType.ASSISTANT,
+                    content=response_text
+                )
+                yield sse_event("review", {
+                    "conversation_id": conversation.id,
+                    "response": response_text,
+                    "intent": result.get("intent"),
+                    "requires_approval": True,
+                })
+                return
+
+            response_text = result.get("response") or "".join(streamed).strip() or "I'm sorry, I couldn't process that."
+            self.save_message(
+                conversation_id=conversation.id,
+                role=RoleType.ASSISTANT,
+                content=response_text,
+                intent=result.get("intent")
+            )
+
+        except LLMOverloadedError as e:
+            logger.warning(f"Streaming chat rejected by LLM admission control: {e}")
+            yield sse_event("error", {
+                "detail": "The assistant is busy right now, please try again in a moment.",
+                "code": "overloaded",
+                "retry_after": 5,
+            })
+            return
+
+        except Exception as e:
+            logger.error(f"Streaming chat failed: {e}")
+            yield sse_event("error", {"detail": f"Failed to process message: {str(e)}"})
+            return
+
+        yield sse_event("done", {
+            "conversation_id": conversation.id,
+            "response": response_text,
+            "intent": result.get("intent"),
+            "time_to_first_token_ms": first_token_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000),
+        })
 
     def save_message(
             self,
@@ -200,7 +339,7 @@ class ChatService:
 
         thread_config = {
             "configurable": {
-                "thread_id": f"{session_id}_conv_{conversation_id}"
+                "thread_id": thread_id(session_id, conversation_id)
             }
         }
 
@@ -208,6 +347,7 @@ class ChatService:
 
         if not approved:
             logger.info("Credentials rejected by human")
+            SPECULATIVE_SQL.discard(thread_config["configurable"]["thread_id"])
 
             update_values = {
                 "credentials_approved": False,
@@ -219,7 +359,9 @@ class ChatService:
 
             await self.agent.aupdate_state(thread_config, update_values, as_node="credential_review_node")
 
-            result = await self.agent.ainvoke(None, config=thread_config)
+            # Resumed HITL turns jump the LLM queue ahead of fresh messages.
+            with llm_priority(LLMPriority.HIGH):
+                result = await self.agent.ainvoke(None, config=thread_config)
 
             response_text = result.get("response", "Credentials were rejected. Please provide correct details.")
             self.save_message(
@@ -252,7 +394,9 @@ class ChatService:
 
         await self.agent.aupdate_state(thread_config, update_values)
 
-        result = await self.agent.ainvoke(None, config=thread_config)
+        # Resumed HITL turns jump the LLM queue ahead of fresh messages.
+        with llm_priority(LLMPriority.HIGH):
+            result = await self.agent.ainvoke(None, config=thread_config)
 
         response_text = result.get("response", "Credentials confirmed.")
         intent = result.get("intent")
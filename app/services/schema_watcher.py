@@ -0,0 +1,55 @@
+import threading
+from typing import Optional
+
+from app.agents.embeddings.schema_index import COLUMN_INDEX, TABLE_INDEX
+from app.agents.embeddings.service import EMBEDDINGS
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db.schema_catalog import SCHEMA_CATALOG
+
+logger = get_logger("schema_watcher")
+
+
+class SchemaWatcher:
+    """
+    Background thread that keeps the schema catalog and embedding indexes current.
+
+    Every interval it compares per-table signatures from information_schema,
+    re-reflects only the changed tables and re-embeds only their rows, so
+    request threads always find a ready snapshot and index.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="schema-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Schema watcher started, polling every {self.interval}s")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        self.poll()
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def poll(self):
+        try:
+            snapshot = SCHEMA_CATALOG.refresh()
+            TABLE_INDEX.ensure(snapshot, EMBEDDINGS, EMBEDDINGS.model_name)
+            COLUMN_INDEX.ensure(snapshot, EMBEDDINGS, EMBEDDINGS.model_name)
+        except Exception as e:
+            logger.error(f"Schema watcher poll failed: {e}")
+
+
+SCHEMA_WATCHER = SchemaWatcher(settings.SCHEMA_WATCH_INTERVAL_SECONDS)
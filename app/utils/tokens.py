@@ -0,0 +1,26 @@
+from functools import lru_cache
+
+from app.core.logger import get_logger
+
+logger = get_logger("tokens")
+
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(encoding_name: str):
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.warning(f"tiktoken encoding {encoding_name} unavailable, estimating tokens: {e}")
+        return None
+
+
+def count_tokens(text: str, encoding_name: str = "o200k_base") -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding(encoding_name)
+    if encoding is None:
+        return len(text) // _CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))